@@ -1,12 +1,132 @@
-from flask import Flask, render_template, request, redirect, url_for
-from services.calendar import get_todays_jobs
+from flask import Flask, render_template, request, redirect, url_for, g, Response, make_response
+from services import auth
 from services.sheets import SheetsService
 from datetime import datetime
-from utils.logger import log_info, log_error, log_warning
+from utils.logger import log_info, log_error, log_warning, bind_log_context, clear_log_context
+from utils.work_queue import WorkQueue
+from utils.metrics import metrics, CONTENT_TYPE
+from utils.page_cache import PageCache
+from utils.idempotency import IdempotencyStore
+import config
+import hashlib
 import os
+import time
+import uuid
 
 app = Flask(__name__)
 
+# Calendar side effects of a submit run here, after the response is sent
+calendar_queue = WorkQueue('calendar', workers=config.CALENDAR_QUEUE_WORKERS)
+
+# Rendered form pages by job_id, so reopening a link skips the lookup and render.
+# Shared: a submit on any worker invalidates the page in every worker.
+form_cache = PageCache(config.FORM_CACHE_SIZE, config.FORM_CACHE_TTL_SECONDS, shared=True)
+
+# /submit results by (idempotency key, job_id), shared by all workers; repeats get the first result back
+submissions = IdempotencyStore('submit', config.SUBMIT_IDEMPOTENCY_MAX_KEYS, config.SUBMIT_IDEMPOTENCY_TTL_SECONDS)
+
+def _template_version():
+    """Changes whenever a form template changes, so a deploy invalidates old ETags."""
+    folder = os.path.join(app.root_path, app.template_folder)
+    return ",".join(
+        str(os.path.getmtime(os.path.join(folder, name)))
+        for name in ('report.html', 'already_submitted.html')
+        if os.path.exists(os.path.join(folder, name))
+    )
+
+_TEMPLATE_VERSION = _template_version()
+
+def form_etag(row_data):
+    """ETag from everything the form page shows: date, summary, status, revenue fields, source."""
+    state = repr((_TEMPLATE_VERSION, list(row_data[:7]), row_data[8] if len(row_data) > 8 else ''))
+    return hashlib.sha1(state.encode('utf-8')).hexdigest()
+
+# Rendered into cached form pages in place of the idempotency key; every response
+# gets a fresh key (with_idempotency_key), so two opens of a link never share one
+_IDEMPOTENCY_KEY_SLOT = '__IDEMPOTENCY_KEY__'
+
+def with_idempotency_key(body):
+    """A cached form page with a new idempotency key for this response."""
+    return body.replace(_IDEMPOTENCY_KEY_SLOT, uuid.uuid4().hex)
+
+def _form_response(body, etag):
+    response = make_response(with_idempotency_key(body))
+    response.set_etag(etag)
+    # Browsers may keep the page but must revalidate; a 304 costs no lookup
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Every log line of this request carries the route, job_id and elapsed_ms
+    bind_log_context(route=request.path, job_id=request.values.get('job_id'))
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Label by route pattern, not raw path, to keep the series count bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.record_http_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+@app.teardown_request
+def release_submission_claim(exc):
+    # A submit that did not complete (validation error, failure) frees its key for a retry
+    key = g.pop('submission_key', None)
+    if key:
+        submissions.release(key)
+    # Request threads are reused; don't leak this request's fields into the next
+    clear_log_context()
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+def render_form_page(job_id, row_data, date_param, etag, version):
+    """
+    Renders the form for a job row (or the already-submitted page) and caches it
+    under `version`, the form_cache version read before the row was looked up.
+    Needs an app context; shared by the Flask route and the ASGI mode (asgi.py).
+    """
+    # Check if already submitted (Status column D, index 3 is not empty)
+    if len(row_data) > 3 and row_data[3]:
+        log_warning(f"Job {job_id} already submitted")
+        body = render_template('already_submitted.html', date=row_data[0] if row_data else date_param)
+        form_cache.put(job_id, etag, body, version)
+        return body
+    
+    # Build job object from row data
+    # Row: [Date, Job ID, Summary, Status, Total, Net, Payment, Submitted At, Source]
+    job = {
+        'id': row_data[1] if len(row_data) > 1 else job_id,
+        'summary': row_data[2] if len(row_data) > 2 else 'Unknown Job',
+        'source': row_data[8] if len(row_data) > 8 else 'Other',
+        # Pre-fill existing values if any
+        'status': row_data[3] if len(row_data) > 3 else '',
+        'total_revenue': row_data[4] if len(row_data) > 4 else '',
+        'net_revenue': row_data[5] if len(row_data) > 5 else '',
+        'payment_type': row_data[6] if len(row_data) > 6 else '',
+    }
+    
+    date_str = row_data[0] if row_data else date_param or datetime.now().strftime("%Y-%m-%d")
+    
+    log_info(f"Loading form for: {job['summary']}")
+    # Each served form carries its own key, filled in per response; every repeat
+    # of that form's submit shares it
+    body = render_template('report.html', jobs=[job], date=date_str, single_job_mode=True,
+                           idempotency_key=_IDEMPOTENCY_KEY_SLOT)
+    form_cache.put(job_id, etag, body, version)
+    return body
+
 @app.route('/')
 def index():
     try:
@@ -20,6 +140,15 @@ def index():
             log_warning("No job_id provided")
             return "Missing job_id parameter. Use the form link from your calendar event.", 400
         
+        cached = form_cache.get(job_id_param)
+        if cached:
+            etag, body = cached
+            if request.if_none_match.contains(etag):
+                return _not_modified(etag)
+            return _form_response(body, etag)
+        
+        # Read before the lookup: a submit elsewhere after this point makes the page stale
+        version = form_cache.version(job_id_param)
         sheets = SheetsService()
         
         log_info(f"Loading form for job_id={job_id_param}")
@@ -31,28 +160,13 @@ def index():
             log_error(f"Job {job_id_param} not found in sheets")
             return "Job not found. This link may be expired.", 404
         
-        # Check if already submitted (Status column D, index 3 is not empty)
-        if len(row_data) > 3 and row_data[3]:
-            log_warning(f"Job {job_id_param} already submitted")
-            return render_template('already_submitted.html', date=row_data[0] if row_data else date_param)
-        
-        # Build job object from row data
-        # Row: [Date, Job ID, Summary, Status, Total, Net, Payment, Submitted At, Source]
-        job = {
-            'id': row_data[1] if len(row_data) > 1 else job_id_param,
-            'summary': row_data[2] if len(row_data) > 2 else 'Unknown Job',
-            'source': row_data[8] if len(row_data) > 8 else 'Other',
-            # Pre-fill existing values if any
-            'status': row_data[3] if len(row_data) > 3 else '',
-            'total_revenue': row_data[4] if len(row_data) > 4 else '',
-            'net_revenue': row_data[5] if len(row_data) > 5 else '',
-            'payment_type': row_data[6] if len(row_data) > 6 else '',
-        }
-        
-        date_str = row_data[0] if row_data else date_param or datetime.now().strftime("%Y-%m-%d")
-        
-        log_info(f"Loading form for: {job['summary']} (sheet: {sheet_name})")
-        return render_template('report.html', jobs=[job], date=date_str, single_job_mode=True)
+        etag = form_etag(row_data)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        
+        log_info(f"Loading form for job {job_id_param} (sheet: {sheet_name})")
+        body = render_form_page(job_id_param, row_data, date_param, etag, version)
+        return _form_response(body, etag)
         
     except Exception as e:
         log_error(f"Error loading form page: {str(e)}", exc_info=True)
@@ -73,11 +187,24 @@ def submit():
             return "Invalid form submission", 400
         
         jid = job_id_list[0]
+        
         status = request.form.get(f'status_{jid}')
         total_rev = request.form.get(f'total_{jid}', '').strip()
         net_rev = request.form.get(f'net_{jid}', '').strip()
         payment_type = request.form.get(f'payment_{jid}', '')
         
+        idempotency_key = request.form.get('idempotency_key')
+        if idempotency_key:
+            # Keyed on the submitted values too: only an identical repeat gets the
+            # first result back, different data under the same key is processed
+            fingerprint = hashlib.sha1(repr((status, total_rev, net_rev, payment_type)).encode('utf-8')).hexdigest()
+            submission_key = (idempotency_key, jid, fingerprint)
+            previous = submissions.claim(submission_key)
+            if previous is not None:
+                log_info(f"Repeated submit for job {jid}; returning the original result")
+                return previous
+            g.submission_key = submission_key
+        
         log_info(f"Processing job {jid} with status: {status}")
         
         # Server-side validation for "Yes" status
@@ -115,123 +242,69 @@ def submit():
             payment_type=payment_type
         )
         
+        # The cached form no longer matches the row
+        form_cache.invalidate(jid)
+        
         if result:
             log_info(f"Updated job {jid} in Google Sheets")
             
-            # Update Calendar: Remove form link and mark as completed
+            # Update Calendar in the background: Remove form link and mark as completed.
+            # The revenue is already saved, so the crew doesn't wait on Calendar.
             from services.calendar import mark_event_as_completed
-            mark_result = mark_event_as_completed(jid)
-            if mark_result:
-                log_info(f"Updated calendar event {jid}")
-            else:
-                log_warning(f"Failed to update calendar event {jid}")
+            calendar_queue.submit(mark_event_as_completed, jid, description=f"mark calendar event {jid} completed")
                 
         else:
             log_error(f"Failed to update job {jid}")
             return "Error saving data. Please try again.", 500
         
-        return render_template('success.html')
+        body = render_template('success.html')
+        submission_key = g.pop('submission_key', None)
+        if submission_key:
+            submissions.complete(submission_key, body)
+        return body
         
     except Exception as e:
         log_error(f"Error processing form submission: {str(e)}", exc_info=True)
         return "Error submitting form. Please try again.", 500
 
 
-if __name__ == '__main__':
-    # Railway sets PORT environment variable
-    port = int(os.getenv('PORT', 5001))
-    debug_mode = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
-    
-    # Start the scheduler locally
-    # Note: In production (Gunicorn), the scheduler is started by the code above `if __name__`
-    # But we need to ensure it runs. 
-    # Actually, putting it in global scope (outside if main) ensures it runs in Gunicorn too.
-    
-    app.run(debug=debug_mode, host='0.0.0.0', port=port, use_reloader=False)
-
-# Scheduler Setup (Global Scope to run in Gunicorn)
-from apscheduler.schedulers.background import BackgroundScheduler
-from zoneinfo import ZoneInfo
-from prepopulate import main as prepopulate_job
-
-def run_prepopulate_job():
-    """Wrapper to ensure scheduler job is logged properly."""
-    log_info("⏰ SCHEDULED JOB TRIGGERED: prepopulate_job starting...")
-    try:
-        prepopulate_job()
-        log_info("✅ SCHEDULED JOB COMPLETED: prepopulate_job finished successfully")
-    except Exception as e:
-        log_error(f"❌ SCHEDULED JOB FAILED: prepopulate_job crashed: {e}", exc_info=True)
-
-def send_reminder_job():
+def warm_up(request_threads=0):
     """
-    Check if a submission exists for today at 9:00 PM. 
-    If not, send a reminder email.
+    Optional warm-up before a worker takes traffic (WARM_UP_ON_START): Google
+    credentials, the job lookup, the form templates, and API clients. Clients
+    are cached per thread, so when requests are served on other threads than
+    this one, pass their number: Sheets clients are built for each of them
+    (this thread's included) and Calendar clients for the /submit queue workers.
+    A failure is logged and the worker starts cold.
     """
+    started = time.perf_counter()
     try:
-        from zoneinfo import ZoneInfo
-        la_tz = ZoneInfo('America/Los_Angeles')
-        today_str = datetime.now(la_tz).strftime("%Y-%m-%d")
-        
-        sheets = SheetsService()
-        if not sheets.check_date_exists(today_str):
-            log_info(f"Report for {today_str} missing at 9:00 PM. Sending reminder.")
-            # Note: Email reminders now handled by Make.com
-            # If you want to re-enable, import and call send_email here
-        else:
-            log_info(f"Report for {today_str} already submitted. Skipping reminder.")
+        SheetsService().warm_up()
+        import services.calendar  # noqa: F401 - used by the /submit queue
+        if request_threads:
+            auth.release_thread_clients()
+            auth.prebuild_clients('sheets', 'v4', request_threads - 1)
+            auth.prebuild_clients('calendar', 'v3', config.CALENDAR_QUEUE_WORKERS)
+        for name in ('report.html', 'already_submitted.html', 'success.html'):
+            app.jinja_env.get_template(name)
+        log_info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
     except Exception as e:
-        log_error(f"Error in send_reminder_job: {e}")
+        log_warning(f"Warm-up failed, starting cold: {e}")
 
-def start_scheduler():
-    try:
-        # Check if scheduler is already running or if we are in a reloader child process to avoid double run
-        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-            return
-
-        scheduler = BackgroundScheduler()
-        
-        # Determine strict timezone
-        la_tz = ZoneInfo('America/Los_Angeles')
-        
-        # Add job: Daily at 9:00 AM LA time (Pre-populate tomorrow's jobs)
-        scheduler.add_job(
-            run_prepopulate_job, 
-            'cron', 
-            hour=9, 
-            minute=0, 
-            timezone=la_tz,
-            id='prepopulate_job',
-            replace_existing=True
-        )
 
-        # Add job: Daily at 9:00 PM LA time (Reminder check)
-        scheduler.add_job(
-            send_reminder_job,
-            'cron', 
-            hour=21, 
-            minute=0, 
-            timezone=la_tz,
-            id='reminder_job',
-            replace_existing=True
-        )
-        
-        scheduler.start()
-        log_info("✅ Internal Scheduler Started: Pre-populate at 9AM, Reminder check at 9PM PST")
-        
-        # Print next run time for verification
-        jobs = scheduler.get_jobs()
-        if jobs:
-            print(f"Next scheduled run: {jobs[0].next_run_time}")
-            
-    except Exception as e:
-        log_error(f"Failed to start scheduler: {e}")
-
-# Start the scheduler immediately on import
-# We use a primitive check to ensure we are not in a build step or similar
-if os.environ.get('RAILWAY_STATIC_URL') or os.environ.get('RAILWAY_ENVIRONMENT'):
-   # We are likely in production
-   start_scheduler()
-else:
-   # Local development - start it too
-   start_scheduler()
+# Process roles (PROCESS_ROLE): 'all' serves HTTP and also runs the scheduler in
+# the one worker holding the scheduler lock; 'web' only serves HTTP, and the jobs
+# run in a separate `python scheduler.py` process. Importing the scheduler here
+# only in 'all' keeps APScheduler and the prepopulate code out of web workers.
+if config.PROCESS_ROLE == 'all' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+    from scheduler import start_when_leader
+    start_when_leader()
+
+
+if __name__ == '__main__':
+    # Railway sets PORT environment variable
+    port = int(os.getenv('PORT', 5001))
+    debug_mode = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
+    
+    # The scheduler was already started (or skipped) by the role check above
+    app.run(debug=debug_mode, host='0.0.0.0', port=port, use_reloader=False)
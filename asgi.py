@@ -0,0 +1,218 @@
+"""
+ASGI serving mode
+
+The per-job form page (GET /) runs natively on asyncio: job lookups go to the
+local mirror or to Sheets through services.async_google, so hundreds of crews
+can open their forms at once from a single process. Every other route
+(/submit, /metrics) is served by the regular Flask app on a small thread pool.
+Submits stay there because their Sheets write shares the per-tab write locks
+with prepopulate; their Calendar update already runs on the background queue.
+
+Run with (needs requirements-asgi.txt):
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+"""
+
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.http import parse_etags
+
+import config
+from app import app as flask_app, form_cache, form_etag, render_form_page, warm_up, with_idempotency_key
+from services.async_google import AsyncGoogleClient, find_job
+from utils.logger import log_info, log_error, log_warning, bind_log_context, clear_log_context
+from utils.metrics import metrics
+
+_wsgi_pool = ThreadPoolExecutor(max_workers=config.ASGI_WSGI_THREADS, thread_name_prefix='wsgi')
+_client = None
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] == 'http':
+        if scope['path'] == '/' and scope['method'] == 'GET':
+            await _timed(form_page, '/', scope, receive, send)
+        else:
+            await _call_flask(scope, receive, send)
+
+
+async def _lifespan(receive, send):
+    global _client
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            _client = AsyncGoogleClient()
+            if config.WARM_UP_ON_START:
+                # Google clients are per thread: build them for the /submit pool
+                await asyncio.to_thread(warm_up, config.ASGI_WSGI_THREADS)
+            log_info("ASGI mode: async Google client ready")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _client:
+                await _client.aclose()
+            _wsgi_pool.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+def _get_client():
+    # Servers without lifespan support never ran startup
+    global _client
+    if _client is None:
+        _client = AsyncGoogleClient()
+    return _client
+
+
+async def _timed(handler, route, scope, receive, send):
+    """Records the same http_request metrics the Flask hooks record."""
+    started = time.perf_counter()
+    bind_log_context(route=route)
+    try:
+        status = await handler(scope, receive, send)
+    finally:
+        clear_log_context()
+    metrics.record_http_request(route, scope['method'], status, time.perf_counter() - started)
+
+
+async def form_page(scope, receive, send):
+    """Async version of app.index. Returns the response status."""
+    try:
+        log_info("Form page accessed")
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        job_id = query.get('job_id', [None])[0]
+        date_param = query.get('date', [None])[0]
+        bind_log_context(job_id=job_id)
+
+        if not job_id:
+            log_warning("No job_id provided")
+            return await _respond(send, 400, "Missing job_id parameter. Use the form link from your calendar event.")
+
+        if_none_match = parse_etags(_header(scope, b'if-none-match'))
+
+        # The cache checks its shared version in SQLite, which blocks
+        cached = await asyncio.to_thread(form_cache.get, job_id)
+        if cached:
+            etag, body = cached
+            if if_none_match.contains(etag):
+                return await _respond(send, 304, None, etag)
+            return await _respond(send, 200, with_idempotency_key(body), etag)
+
+        version = await asyncio.to_thread(form_cache.version, job_id)
+        log_info(f"Loading form for job_id={job_id}")
+        row_num, row_data, sheet_name = await find_job(_get_client(), job_id)
+
+        if not row_data:
+            log_error(f"Job {job_id} not found in sheets")
+            return await _respond(send, 404, "Job not found. This link may be expired.")
+
+        etag = form_etag(row_data)
+        if if_none_match.contains(etag):
+            return await _respond(send, 304, None, etag)
+
+        log_info(f"Loading form for job {job_id} (sheet: {sheet_name})")
+        with flask_app.app_context():
+            body = render_form_page(job_id, row_data, date_param, etag, version)
+        return await _respond(send, 200, with_idempotency_key(body), etag)
+
+    except Exception as e:
+        log_error(f"Error loading form page: {str(e)}", exc_info=True)
+        return await _respond(send, 500, f"Error loading jobs: {str(e)}")
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def _respond(send, status, body, etag=None):
+    headers = []
+    if etag:
+        # Same caching headers as app._form_response
+        headers += [(b'etag', f'"{etag}"'.encode()), (b'cache-control', b'private, no-cache')]
+    payload = b''
+    if body is not None and status != 304:
+        payload = body.encode('utf-8')
+        content_type = b'text/html; charset=utf-8' if etag else b'text/plain; charset=utf-8'
+        headers += [(b'content-type', content_type), (b'content-length', str(len(payload)).encode())]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+    return status
+
+
+# ── Everything else: the Flask (WSGI) app on a thread pool ──────────────
+
+async def _call_flask(scope, receive, send):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            return  # client went away
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    environ = _wsgi_environ(scope, bytes(body))
+    loop = asyncio.get_running_loop()
+    status, headers, payload = await loop.run_in_executor(_wsgi_pool, _run_wsgi, environ)
+
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+def _run_wsgi(environ):
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        payload = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], payload
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for key, value in scope.get('headers', []):
+        name = key.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            name = f"HTTP_{name}"
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Backfill / Reconciliation for an arbitrary date range
+
+Same work as the daily prepopulate run, for any stretch of history (after an
+outage or a calendar cleanup):
+1. One paginated Calendar sweep over the whole range
+2. Each affected monthly tab is read once; only missing rows are inserted, in bulk
+3. Form links are added to the new jobs' events through batch requests
+
+Usage:
+    python backfill.py --from 2026-01-01 --to 2026-03-31
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from services.calendar import iter_jobs_in_range
+from services.sheets import SheetsService
+from prepopulate import process_jobs
+from utils.logger import log_info, log_error
+
+
+def backfill(start_date_str, end_date_str, base_url=None):
+    """
+    Reconciles every calendar job between the two dates (inclusive, YYYY-MM-DD).
+    Returns (found, added, elapsed_seconds).
+    """
+    base_url = base_url or os.getenv('BASE_URL', 'http://localhost:5001')
+    started = time.perf_counter()
+
+    jobs = list(iter_jobs_in_range(start_date_str, end_date_str))
+    fetched = time.perf_counter()
+    log_info(f"Backfill {start_date_str} → {end_date_str}: {len(jobs)} jobs in calendar "
+             f"({fetched - started:.1f}s)")
+
+    added = process_jobs(jobs, None, base_url, SheetsService(), label="backfill") if jobs else 0
+
+    elapsed = time.perf_counter() - started
+    rate = len(jobs) / elapsed if elapsed else 0.0
+    log_info(f"Backfill complete: {added} missing jobs added, {len(jobs) - added} already in sheet. "
+             f"{len(jobs)} jobs in {elapsed:.1f}s ({rate:.1f} jobs/s)")
+    return len(jobs), added, elapsed
+
+
+def _date_arg(value):
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill job rows and form links for a date range.")
+    parser.add_argument('--from', dest='start', required=True, type=_date_arg, help="first date, YYYY-MM-DD (LA time)")
+    parser.add_argument('--to', dest='end', required=True, type=_date_arg, help="last date, YYYY-MM-DD (inclusive)")
+    args = parser.parse_args(argv)
+
+    if args.end < args.start:
+        parser.error("--to must not be before --from")
+
+    try:
+        backfill(args.start, args.end)
+    except Exception as e:
+        log_error(f"Backfill failed: {e}", exc_info=True)
+        return 1
+    finally:
+        # Don't let the process exit with a dashboard refresh pending
+        from services.dashboard import dashboard_refresher
+        dashboard_refresher.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the main flows against the in-process fake Google backend.
+
+For synthetic histories of 1, 12 and 60 monthly tabs it runs the form GET
+(cold caches, warm caches, local mirror), prepopulate.main and /submit, and
+reports wall time and the number of Google API calls per flow. Background work
+a flow triggers (calendar queue, dashboard refresh) is measured separately.
+Fake calls go through the same quota, retry and metrics path as real ones, so
+wall times include any rate-limit waits; each flow starts with full quotas.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_flows [--latency-ms 50] [--tabs 1 12 60] [--jobs-per-month 80]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Keep benchmark state out of the real local DB and hold dashboard refreshes
+# until we flush them explicitly, so each flow's API calls are counted alone.
+os.environ.setdefault('LOCAL_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='bench-'), 'local.db'))
+os.environ['DASHBOARD_DEBOUNCE_SECONDS'] = '3600'
+# The scheduler is not part of any measured flow
+os.environ['PROCESS_ROLE'] = 'web'
+
+from benchmarks.fake_google import FakeGoogle  # noqa: E402
+
+LA_TZ = ZoneInfo('America/Los_Angeles')
+CALENDAR_JOBS_PER_DAY = 10
+
+
+def month_titles(count, today):
+    """The last `count` monthly tab titles, oldest first, ending with today's month."""
+    titles = []
+    year, month = today.year, today.month
+    for _ in range(count):
+        titles.append(datetime(year, month, 1).strftime("%b %Y"))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return list(reversed(titles))
+
+
+def build_history(fake, tabs, jobs_per_month, today):
+    """
+    Fills the fake spreadsheet with `tabs` months of jobs (every 20th one still
+    unsubmitted) and the calendar with jobs for yesterday, today and tomorrow.
+    """
+    header = ["Date", "Job ID", "Summary", "Status", "Total Revenue", "Net Revenue", "Payment Type", "Submitted At", "Source"]
+    totals = ["", "", "TOTALS:", "", "=SUM(E3:E)", "=SUM(F3:F)", "", "", ""]
+    sources = ['Yelp', 'Google LSA', 'Other']
+
+    fake.sheets.add_tab('Summary')
+    for title in month_titles(tabs, today):
+        first = datetime.strptime(title, "%b %Y")
+        rows = [header, totals]
+        for i in range(jobs_per_month):
+            day = first + timedelta(days=i * 28 // jobs_per_month)
+            if i % 20 == 1:
+                submission = ["", "", "", "", ""]
+            else:
+                submission = ["Completed", "1200", "800", "Card", day.strftime("%Y-%m-%d 21:00:00")]
+            rows.append([day.strftime("%Y-%m-%d"), f"hist-{first:%Y%m}-{i}", f"Customer {i}", *submission, sources[i % 3]])
+        fake.sheets.add_tab(title, rows)
+
+    for offset in (-1, 0, 1):
+        day = today + timedelta(days=offset)
+        for i in range(CALENDAR_JOBS_PER_DAY):
+            start = datetime(day.year, day.month, day.day, 8 + i % 10, tzinfo=LA_TZ)
+            fake.calendar.add_event({
+                'id': f"cal{day:%Y%m%d}n{i}",
+                'summary': f"Customer {i} (2br) + piano",
+                'description': f"Customer: Customer {i}\nPhone: 555-0100\nDate: {day:%m/%d}\nSource: {sources[i % 3]}",
+                'start': {'dateTime': start.isoformat()},
+                'end': {'dateTime': (start + timedelta(hours=4)).isoformat()},
+            })
+
+
+def reset_caches():
+    """Forget everything a fresh web worker would not know yet."""
+    from services.job_index import job_index
+    from services.sheets import sheet_metadata
+    job_index.invalidate()
+    sheet_metadata.invalidate()
+
+
+def wait_for_queue(queue, timeout=30):
+    deadline = time.monotonic() + timeout
+    while queue.depth() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def measure(fake, name, tabs, func, results):
+    from services import auth
+    # The fake makes calls through the real token buckets, so without a refill
+    # one flow would pay the throttling debt left by the flows before it
+    auth.reset_quotas()
+    fake.reset_calls()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    results.append((name, tabs, elapsed * 1000, fake.total_calls(), dict(fake.calls)))
+
+
+def run(tab_counts, jobs_per_month, latency):
+    import config
+    from services import auth
+    import app as app_module
+    import prepopulate
+    from services.dashboard import dashboard_refresher
+    from services.sheets import SheetsService
+
+    client = app_module.app.test_client()
+    today = datetime.now(LA_TZ)
+    results = []
+
+    for tabs in tab_counts:
+        fake = FakeGoogle(latency=latency)
+        auth.set_service_factory(fake.service_factory)
+        build_history(fake, tabs, jobs_per_month, today)
+
+        # An unsubmitted job in the oldest tab: the worst case for a cross-month search
+        oldest_job = f"hist-{datetime.strptime(month_titles(tabs, today)[0], '%b %Y'):%Y%m}-1"
+        # One of today's calendar jobs, created by prepopulate below
+        submit_job = f"cal{today:%Y%m%d}n2"
+
+        config.MIRROR_ENABLED = False
+        reset_caches()
+        measure(fake, "form GET (cold caches)", tabs,
+                lambda: client.get(f"/?job_id={oldest_job}"), results)
+        measure(fake, "form GET (warm caches)", tabs,
+                lambda: client.get(f"/?job_id={oldest_job}"), results)
+
+        config.MIRROR_ENABLED = True
+        measure(fake, "mirror sync", tabs, lambda: SheetsService().sync_mirror(), results)
+        measure(fake, "form GET (mirror)", tabs,
+                lambda: client.get(f"/?job_id={oldest_job}"), results)
+
+        reset_caches()
+        measure(fake, "prepopulate.main", tabs, prepopulate.main, results)
+
+        def submit():
+            client.post('/submit', data={
+                'job_id': submit_job, f'status_{submit_job}': 'Yes',
+                f'total_{submit_job}': '1500', f'net_{submit_job}': '900', f'payment_{submit_job}': 'Cash',
+            })
+        measure(fake, "/submit (response)", tabs, submit, results)
+        measure(fake, "/submit (background calendar)", tabs,
+                lambda: wait_for_queue(app_module.calendar_queue), results)
+        measure(fake, "dashboard refresh", tabs, dashboard_refresher.flush, results)
+
+    auth.set_service_factory(None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tabs', type=int, nargs='+', default=[1, 12, 60], help="history sizes in monthly tabs")
+    parser.add_argument('--jobs-per-month', type=int, default=80)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="simulated latency per API round trip")
+    args = parser.parse_args()
+
+    results = run(args.tabs, args.jobs_per_month, args.latency_ms / 1000)
+
+    print()
+    print(f"{'flow':<32} {'tabs':>5} {'wall ms':>10} {'API calls':>10}  breakdown")
+    print("-" * 100)
+    for name, tabs, wall_ms, calls, breakdown in results:
+        detail = ", ".join(
+            f"{k.replace('sheets.spreadsheets.', 'sheets.')}={v}" for k, v in sorted(breakdown.items())
+        )
+        print(f"{name:<32} {tabs:>5} {wall_ms:>10.1f} {calls:>10}  {detail}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the calendar job classifier.
+
+Builds synthetic calendar events (moving jobs in several description styles plus
+non-job events) and reports:
+- _parse_job throughput (events/sec) on its own
+- iter_jobs_in_range over the fake Calendar, paged like the real API, with the
+  time to the first yielded job
+
+Usage (from the repo root):
+    python -m benchmarks.bench_parse [--events 10000] [--repeat 5] [--latency-ms 0]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_google import FakeGoogle  # noqa: E402
+
+LA_TZ = ZoneInfo('America/Los_Angeles')
+
+SOURCES = ['Yelp', 'yelp.com lead', 'Google Local Services', 'LSA', 'Referral', None]
+SUMMARIES = [
+    "{name} (2br) + piano",
+    "{name}",
+    "{name} + storage",
+    "{name} (3br, 2 trucks)",
+]
+
+
+def make_events(count, start_day):
+    """`count` events spread over 30 days; every 5th one is not a moving job."""
+    events = []
+    for i in range(count):
+        day = start_day + timedelta(days=i % 30)
+        start = datetime(day.year, day.month, day.day, 7 + i % 12, tzinfo=LA_TZ)
+        name = f"Customer {i}"
+        if i % 5 == 4:
+            description = "Team meeting\nAgenda: trucks"
+        else:
+            source = SOURCES[i % len(SOURCES)]
+            description = f"Customer: {name}\nPhone: 555-{i:04d}\nDate: {day:%m/%d}\nFrom: A\nTo: B"
+            if source:
+                description += f"\nSource: {source}"
+        events.append({
+            'id': f"ev{i}",
+            'summary': SUMMARIES[i % len(SUMMARIES)].format(name=name),
+            'description': description,
+            'colorId': ['6', '2', '1'][i % 3],
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': (start + timedelta(hours=4)).isoformat()},
+        })
+    return events
+
+
+def bench_parse(events, repeat):
+    from services.calendar import _parse_job
+
+    best = None
+    jobs = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        jobs = sum(1 for event in events if _parse_job(event))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return jobs, best
+
+
+def bench_stream(events, latency, start_day):
+    from services import auth
+    from services.calendar import iter_jobs_in_range
+
+    fake = FakeGoogle(latency=latency)
+    for event in events:
+        fake.calendar.add_event(event)
+    auth.set_service_factory(fake.service_factory)
+    try:
+        started = time.perf_counter()
+        first_job_at = None
+        jobs = 0
+        end_day = start_day + timedelta(days=29)
+        for _ in iter_jobs_in_range(start_day.strftime("%Y-%m-%d"), end_day.strftime("%Y-%m-%d")):
+            if first_job_at is None:
+                first_job_at = time.perf_counter() - started
+            jobs += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        auth.set_service_factory(None)
+    return jobs, elapsed, first_job_at, fake.calls['calendar.events.list']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5, help="parse passes; the best one is reported")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated latency per Calendar page")
+    args = parser.parse_args()
+
+    start_day = datetime.now(LA_TZ).date()
+    events = make_events(args.events, start_day)
+
+    # _parse_job prints every skipped non-job event; keep that out of the timings
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        jobs, parse_s = bench_parse(events, args.repeat)
+        stream_jobs, stream_s, first_s, pages = bench_stream(events, args.latency_ms / 1000, start_day)
+
+    print(f"_parse_job:         {len(events)} events -> {jobs} jobs in {parse_s * 1000:.1f} ms "
+          f"({len(events) / parse_s:,.0f} events/s)")
+    print(f"iter_jobs_in_range: {stream_jobs} jobs from {pages} pages in {stream_s * 1000:.1f} ms "
+          f"({len(events) / stream_s:,.0f} events/s), first job after {first_s * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmarks web worker cold start: the time to import app.py and the time to
+serve the first form page, per process role, with and without warm-up.
+
+Each sample runs in a fresh interpreter, as a new gunicorn worker would. The
+first request is served from the in-process fake Google backend, so it does
+not import the real Google client libraries; their import time (which a real
+worker pays on its first lookup, or during warm-up) is reported separately.
+The first request runs on a new thread, as on a threaded gunicorn worker, so
+per-thread state left by warm-up does not count toward its gain.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_startup [--runs 5] [--latency-ms 50]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a web-only worker should not need at import time
+HEAVY_MODULES = ['apscheduler', 'prepopulate', 'googleapiclient.discovery', 'google.oauth2.service_account']
+
+CASES = [
+    ('all', False),
+    ('web', False),
+    ('web', True),
+]
+
+
+def child(latency, warm):
+    """Runs in the fresh interpreter; prints one JSON line of timings."""
+    sys.path.insert(0, REPO_ROOT)
+    started = time.perf_counter()
+    import app as app_module
+    import_s = time.perf_counter() - started
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+    from benchmarks.bench_flows import build_history
+    from benchmarks.fake_google import FakeGoogle
+    from services import auth
+
+    fake = FakeGoogle(latency=latency)
+    auth.set_service_factory(fake.service_factory)
+    today = datetime.now(ZoneInfo('America/Los_Angeles'))
+    build_history(fake, 3, 80, today)
+    job_id = f"hist-{today:%Y%m}-1"
+
+    warm_s = 0.0
+    if warm:
+        started = time.perf_counter()
+        app_module.warm_up(request_threads=1)
+        warm_s = time.perf_counter() - started
+
+    first = {}
+
+    def first_request():
+        client = app_module.app.test_client()
+        started = time.perf_counter()
+        first['status'] = client.get(f"/?job_id={job_id}").status_code
+        first['s'] = time.perf_counter() - started
+
+    thread = threading.Thread(target=first_request, name='request-1')
+    thread.start()
+    thread.join()
+    first_s = first['s']
+    assert first['status'] == 200, first['status']
+
+    started = time.perf_counter()
+    import googleapiclient.discovery  # noqa: F401
+    import googleapiclient.http  # noqa: F401
+    import google.oauth2.service_account  # noqa: F401
+    google_s = time.perf_counter() - started
+
+    print(json.dumps({'import': import_s, 'warm': warm_s, 'first': first_s, 'google': google_s, 'loaded': loaded}))
+
+
+def sample(role, warm, latency):
+    state_dir = tempfile.mkdtemp(prefix='bench-startup-')
+    env = dict(
+        os.environ,
+        PROCESS_ROLE=role,
+        MIRROR_ENABLED='false',
+        CALENDAR_SYNC_INTERVAL_MINUTES='0',
+        LOCAL_DB_PATH=os.path.join(state_dir, 'local.db'),
+        SCHEDULER_LOCK_PATH=os.path.join(state_dir, 'scheduler.lock'),
+    )
+    args = [sys.executable, '-m', 'benchmarks.bench_startup', '--child', '--latency-ms', str(latency * 1000)]
+    if warm:
+        args.append('--warm')
+    out = subprocess.run(args, cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="fresh processes per case")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="simulated latency per API round trip")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--warm', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.latency_ms / 1000, args.warm)
+        return
+
+    print(f"{'role':<6} {'warm-up':<8} {'import ms':>10} {'warm-up ms':>11} {'1st req ms':>11} {'google libs ms':>15}  heavy modules after import")
+    print("-" * 110)
+    for role, warm in CASES:
+        samples = [sample(role, warm, args.latency_ms / 1000) for _ in range(args.runs)]
+
+        def median_ms(key):
+            return statistics.median(s[key] for s in samples) * 1000
+
+        loaded = ", ".join(samples[0]['loaded']) or "-"
+        print(f"{role:<6} {'yes' if warm else 'no':<8} {median_ms('import'):>10.1f} {median_ms('warm'):>11.1f} "
+              f"{median_ms('first'):>11.1f} {median_ms('google'):>15.1f}  {loaded}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+"""
+In-process fake of the Google Sheets and Calendar API surfaces this project uses.
+
+Install it with services.auth.set_service_factory(fake.service_factory) and every
+get_service() call returns the fake instead of a real client. Each execute()
+sleeps for the configured latency and is counted in fake.calls, so flows can be
+measured by wall time and number of API calls without Google access.
+
+Only the calls made by services/sheets.py and services/calendar.py are supported.
+async_transport() serves the Sheets REST reads of services/async_google.py from
+the same data (needs httpx).
+"""
+
+import builtins
+import collections
+import copy
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+
+class FakeGoogle:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = collections.Counter()
+        self.lock = threading.RLock()
+        self.sheets = FakeSheets(self)
+        self.calendar = FakeCalendar(self)
+
+    def service_factory(self, api_name, api_version):
+        if api_name == 'sheets':
+            return self.sheets
+        if api_name == 'calendar':
+            return self.calendar
+        raise ValueError(f"Fake backend does not provide {api_name} {api_version}")
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def async_transport(self):
+        """httpx transport answering the Sheets REST reads used by AsyncGoogleClient."""
+        import asyncio
+        import json
+        from urllib.parse import unquote, urlsplit
+        import httpx
+
+        async def handle(request):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            path = unquote(urlsplit(str(request.url)).path)
+            # /v4/spreadsheets/{id}[/values/{range} | /values:batchGet]
+            rest = path.split('/', 4)[4] if path.count('/') >= 4 else ''
+            values = self.sheets.values()
+            if rest.startswith('values:batchGet'):
+                call = values.batchGet(spreadsheetId=None, ranges=request.url.params.get_list('ranges'))
+            elif rest.startswith('values/'):
+                call = values.get(spreadsheetId=None, range=rest[len('values/'):])
+            else:
+                call = self.sheets.get(spreadsheetId=None)
+            with self.lock:
+                self.calls[call.methodId] += 1
+                result = call._run()
+            return httpx.Response(200, content=json.dumps(result).encode())
+
+        return httpx.MockTransport(handle)
+
+    def reset_calls(self):
+        self.calls.clear()
+
+
+# HTTP method of each API method, by its last name segment (decides the quota bucket)
+_HTTP_METHODS = {'get': 'GET', 'list': 'GET', 'batchGet': 'GET', 'update': 'PUT', 'patch': 'PATCH'}
+
+
+class FakeRequest:
+    """
+    Stands in for googleapiclient's HttpRequest. execute() goes through the same
+    services.auth.execute_request as real clients, so calls wait on the real
+    token buckets and are recorded in the metrics.
+    """
+
+    def __init__(self, backend, method_id, run):
+        self.backend = backend
+        self.methodId = method_id
+        self.method = _HTTP_METHODS.get(method_id.rsplit('.', 1)[-1], 'POST')
+        self._run = run
+
+    def execute(self, num_retries=0):
+        from services.auth import execute_request
+        return execute_request(self.methodId, self.method, self._send)
+
+    def _send(self):
+        if self.backend.latency:
+            time.sleep(self.backend.latency)
+        with self.backend.lock:
+            self.backend.calls[self.methodId] += 1
+            return self._run()
+
+
+class FakeBatch:
+    """Stands in for BatchHttpRequest: one round trip, one callback per request."""
+
+    def __init__(self, backend, callback):
+        self.backend = backend
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None, callback=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback or self.callback))
+
+    def execute(self):
+        if self.backend.latency:
+            time.sleep(self.backend.latency)
+        with self.backend.lock:
+            self.backend.calls['batch'] += 1
+            for request_id, request, callback in self.requests:
+                try:
+                    response = request._run()
+                except Exception as e:
+                    callback(request_id, None, e)
+                else:
+                    callback(request_id, response, None)
+
+
+class FakeHttpError(Exception):
+    """Carries a status like googleapiclient.errors.HttpError's resp.status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.resp = type('Resp', (), {'status': status, 'get': lambda self, key, default=None: default})()
+
+
+# ── Sheets ──────────────────────────────────────────────────────────
+
+def _column_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _parse_a1(a1):
+    """'Jan 2026'!A3:I -> (title, first_row, last_row, first_col, last_col), 0-based, None = open."""
+    match = re.match(r"^(?:'((?:[^']|'')+)'|([^!]+))(?:!(.*))?$", a1)
+    title = (match.group(1) or match.group(2)).replace("''", "'")
+    ref = match.group(3)
+    if not ref:
+        return title, 0, None, 0, None
+
+    def cell(part):
+        m = re.match(r'^([A-Z]*)(\d*)$', part)
+        col = _column_index(m.group(1)) if m.group(1) else None
+        row = int(m.group(2)) - 1 if m.group(2) else None
+        return row, col
+
+    parts = ref.split(':')
+    first_row, first_col = cell(parts[0])
+    if len(parts) == 1:
+        return title, first_row or 0, first_row, first_col or 0, first_col
+    last_row, last_col = cell(parts[1])
+    return title, first_row or 0, last_row, first_col or 0, last_col
+
+
+_NUMBER = re.compile(r'-?\d+(\.\d+)?')
+
+
+def _render(rows, value_render_option):
+    """
+    Cells are stored as written. Unformatted reads return numeric text as
+    numbers, as Sheets does for values entered with USER_ENTERED.
+    """
+    if value_render_option not in ('UNFORMATTED_VALUE', 'FORMULA'):
+        return rows
+    return [[_number_or_text(v) for v in row] for row in rows]
+
+
+def _number_or_text(value):
+    if isinstance(value, str) and _NUMBER.fullmatch(value):
+        number = float(value)
+        return int(number) if number == int(number) else number
+    return value
+
+
+def _trim(rows):
+    """Drops trailing empty cells and rows, like the Sheets API does."""
+    out = []
+    for row in rows:
+        row = ["" if v is None else v for v in row]
+        while row and row[-1] == "":
+            row.pop()
+        out.append(row)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+class FakeSheets:
+    def __init__(self, backend):
+        self.backend = backend
+        self.tabs = collections.OrderedDict()  # title -> {'sheetId': int, 'rows': [[...]]}
+        self._next_id = 1000
+
+    def add_tab(self, title, rows=None, index=None):
+        tab = {'sheetId': self._next_id, 'rows': [list(r) for r in rows or []]}
+        self._next_id += 1
+        self.tabs[title] = tab
+        if index == 0:
+            self.tabs.move_to_end(title, last=False)
+        return tab
+
+    def rows(self, title):
+        return self.tabs[title]['rows']
+
+    def _tab_by_id(self, sheet_id):
+        for tab in self.tabs.values():
+            if tab['sheetId'] == sheet_id:
+                return tab
+        raise FakeHttpError(400, f"No sheet with id {sheet_id}")
+
+    def _tab(self, title):
+        if title not in self.tabs:
+            raise FakeHttpError(400, f"Unable to parse range: {title}")
+        return self.tabs[title]
+
+    # spreadsheets()
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return FakeValues(self)
+
+    def get(self, spreadsheetId, fields=None, **kwargs):
+        def run():
+            return {'sheets': [
+                {'properties': {'title': title, 'sheetId': tab['sheetId']}}
+                for title, tab in self.tabs.items()
+            ]}
+        return FakeRequest(self.backend, 'sheets.spreadsheets.get', run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        return FakeRequest(self.backend, 'sheets.spreadsheets.batchUpdate', lambda: self._batch_update(body))
+
+    def _batch_update(self, body):
+        replies = []
+        for request in body['requests']:
+            if 'addSheet' in request:
+                props = request['addSheet']['properties']
+                if props['title'] in self.tabs:
+                    raise FakeHttpError(400, f"A sheet with the name \"{props['title']}\" already exists")
+                tab = self.add_tab(props['title'], index=props.get('index'))
+                replies.append({'addSheet': {'properties': {'title': props['title'], 'sheetId': tab['sheetId']}}})
+                continue
+
+            if 'insertDimension' in request:
+                rng = request['insertDimension']['range']
+                rows = self._tab_by_id(rng['sheetId'])['rows']
+                while len(rows) < rng['startIndex']:
+                    rows.append([])
+                rows[rng['startIndex']:rng['startIndex']] = [[] for _ in range(rng['endIndex'] - rng['startIndex'])]
+
+            elif 'updateCells' in request:
+                update = request['updateCells']
+                start = update['start']
+                rows = self._tab_by_id(start['sheetId'])['rows']
+                for i, row_data in enumerate(update['rows']):
+                    row_idx = start['rowIndex'] + i
+                    while len(rows) <= row_idx:
+                        rows.append([])
+                    rows[row_idx] = [self._cell_text(cell) for cell in row_data.get('values', [])]
+
+            elif 'repeatCell' in request:
+                repeat = request['repeatCell']
+                rng = repeat['range']
+                rows = self._tab_by_id(rng['sheetId'])['rows']
+                number_format = repeat['cell'].get('userEnteredFormat', {}).get('numberFormat', {})
+                if number_format.get('type') == 'DATE':
+                    # Only the rendering of date serials changes; other formats are not modelled
+                    col = rng.get('startColumnIndex', 0)
+                    for row in rows[rng.get('startRowIndex', 0):rng.get('endRowIndex')]:
+                        if len(row) > col and isinstance(row[col], (int, float)):
+                            row[col] = (date(1899, 12, 30) + timedelta(days=row[col])).isoformat()
+
+            replies.append({})
+        return {'replies': replies}
+
+    @staticmethod
+    def _cell_text(cell):
+        value = cell.get('userEnteredValue', {})
+        if 'numberValue' in value:
+            return value['numberValue']
+        if value:
+            return next(iter(value.values()))
+        return ""
+
+
+class FakeValues:
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.backend = sheets.backend
+
+    def _read(self, a1):
+        title, r1, r2, c1, c2 = _parse_a1(a1)
+        rows = self.sheets._tab(title)['rows']
+        selected = rows[r1:None if r2 is None else r2 + 1]
+        return _trim([row[c1:None if c2 is None else c2 + 1] for row in selected])
+
+    def _write(self, a1, values):
+        title, r1, _, c1, _ = _parse_a1(a1)
+        rows = self.sheets._tab(title)['rows']
+        for i, new_row in enumerate(values):
+            while len(rows) <= r1 + i:
+                rows.append([])
+            row = rows[r1 + i]
+            for j, value in enumerate(new_row):
+                while len(row) <= c1 + j:
+                    row.append("")
+                row[c1 + j] = "" if value is None else value
+
+    def get(self, spreadsheetId, range, valueRenderOption=None, **kwargs):
+        return FakeRequest(self.backend, 'sheets.spreadsheets.values.get',
+                           lambda: {'range': range, 'values': _render(self._read(range), valueRenderOption)})
+
+    def batchGet(self, spreadsheetId, ranges, valueRenderOption=None, **kwargs):
+        return FakeRequest(self.backend, 'sheets.spreadsheets.values.batchGet',
+                           lambda: {'valueRanges': [{'range': r, 'values': _render(self._read(r), valueRenderOption)}
+                                                    for r in ranges]})
+
+    def update(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        def run():
+            self._write(range, body['values'])
+            return {'updatedRange': range}
+        return FakeRequest(self.backend, 'sheets.spreadsheets.values.update', run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def run():
+            for data in body['data']:
+                self._write(data['range'], data['values'])
+            return {'totalUpdatedRows': sum(len(d['values']) for d in body['data'])}
+        return FakeRequest(self.backend, 'sheets.spreadsheets.values.batchUpdate', run)
+
+    def append(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        def run():
+            title = _parse_a1(range)[0]
+            rows = self.sheets._tab(title)['rows']
+            rows.extend(list(v) for v in body['values'])
+            return {'updates': {'updatedCells': sum(len(v) for v in body['values'])}}
+        return FakeRequest(self.backend, 'sheets.spreadsheets.values.append', run)
+
+    def clear(self, spreadsheetId, range, body=None):
+        def run():
+            title, r1, r2, _, _ = _parse_a1(range)
+            rows = self.sheets._tab(title)['rows']
+            for i in builtins.range(r1, len(rows) if r2 is None else min(r2 + 1, len(rows))):
+                rows[i] = []
+            return {'clearedRange': range}
+        return FakeRequest(self.backend, 'sheets.spreadsheets.values.clear', run)
+
+
+
+# ── Calendar ────────────────────────────────────────────────────────
+
+def _event_start(event):
+    start = event['start']
+    if 'dateTime' in start:
+        return datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
+    return datetime.fromisoformat(start['date'] + 'T00:00:00+00:00')
+
+
+class FakeCalendar:
+    def __init__(self, backend, page_size=250):
+        self.backend = backend
+        self.page_size = page_size
+        self.events_by_id = collections.OrderedDict()
+        self._version = 0
+        self._versions = {}  # event id -> version of last change
+
+    def add_event(self, event):
+        self._version += 1
+        self.events_by_id[event['id']] = copy.deepcopy(event)
+        self._versions[event['id']] = self._version
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self.backend, callback)
+
+    def events(self):
+        return self
+
+    def list(self, calendarId, timeMin=None, timeMax=None, pageToken=None, syncToken=None, **kwargs):
+        def run():
+            events = list(self.events_by_id.values())
+            if syncToken is not None:
+                events = [e for e in events if self._versions[e['id']] > int(syncToken)]
+            else:
+                if timeMin:
+                    low = datetime.fromisoformat(timeMin.replace('Z', '+00:00'))
+                    events = [e for e in events if _event_start(e) >= low]
+                if timeMax:
+                    high = datetime.fromisoformat(timeMax.replace('Z', '+00:00'))
+                    events = [e for e in events if _event_start(e) <= high]
+                events.sort(key=_event_start)
+
+            start = int(pageToken or 0)
+            page = events[start:start + self.page_size]
+            result = {'items': copy.deepcopy(page)}
+            if start + self.page_size < len(events):
+                result['nextPageToken'] = str(start + self.page_size)
+            else:
+                result['nextSyncToken'] = str(self._version)
+            return result
+        return FakeRequest(self.backend, 'calendar.events.list', run)
+
+    def _event(self, event_id):
+        if event_id not in self.events_by_id:
+            raise FakeHttpError(404, f"Event {event_id} not found")
+        return self.events_by_id[event_id]
+
+    def get(self, calendarId, eventId, fields=None, **kwargs):
+        return FakeRequest(self.backend, 'calendar.events.get', lambda: copy.deepcopy(self._event(eventId)))
+
+    def update(self, calendarId, eventId, body, **kwargs):
+        def run():
+            self._event(eventId)
+            self.add_event(body)
+            return copy.deepcopy(body)
+        return FakeRequest(self.backend, 'calendar.events.update', run)
+
+    def patch(self, calendarId, eventId, body, fields=None, **kwargs):
+        def run():
+            event = copy.deepcopy(self._event(eventId))
+            event.update(copy.deepcopy(body))
+            self.add_event(event)
+            return event
+        return FakeRequest(self.backend, 'calendar.events.patch', run)
@@ -12,6 +12,9 @@ SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets' # For linking to sheets
 ]
 
+# Refresh the cached access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
 # Client Email extracted from service_account.json
 # Client Email: moving-tracker-server@ad-report-automation-484101.iam.gserviceaccount.com
 
@@ -21,6 +24,94 @@ CALENDAR_ID = 'info@splendidmoving.com' # User's shared calendar
 
 TARGET_SPREADSHEET_ID = "1USAoTNsUKIzg4XKzyeQANUYDNQCblQa8ROJ2Q3d1s7k"
 
+# How long sheet titles/sheetIds are cached before re-reading spreadsheet metadata
+SHEET_METADATA_TTL_SECONDS = int(os.getenv('SHEET_METADATA_TTL_SECONDS', 300))
+
+# Logging (utils/logger.py). LOG_FILE='' logs to the console only. Rotation is
+# daily (LOG_ROTATE_WHEN), or by size once LOG_MAX_BYTES > 0; a rotating file is
+# not shared safely by several gunicorn workers, so with WEB_CONCURRENCY > 1 use
+# the console (Railway keeps it) or give each process its own LOG_FILE.
+LOG_FILE = os.getenv('LOG_FILE', os.path.join('logs', 'app.log'))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', 'midnight')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 0))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 14))
+# 'text' or 'json' (one object per line with job_id, route and timing fields)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+
+# Summary dashboard rebuilds are coalesced into one per window (seconds)
+DASHBOARD_DEBOUNCE_SECONDS = int(os.getenv('DASHBOARD_DEBOUNCE_SECONDS', 60))
+
+# 'formulas': the Summary holds live SUM/SUMIF/COUNTIF formulas over each monthly sheet.
+# 'values': totals are computed in Python and written as static values, so the
+# workbook has nothing to recalculate on edits; they refresh after app writes and
+# after mirror syncs that pick up manual edits.
+SUMMARY_MODE = os.getenv('SUMMARY_MODE', 'formulas').lower()
+
+# Background workers for post-submit calendar updates
+CALENDAR_QUEUE_WORKERS = int(os.getenv('CALENDAR_QUEUE_WORKERS', 2))
+
+# Local SQLite database for process state (calendar sync tokens, ...)
+LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', os.path.join('data', 'local.db'))
+
+# Local mirror of job rows: serves form reads from disk, re-synced from Sheets periodically
+MIRROR_ENABLED = os.getenv('MIRROR_ENABLED', 'true').lower() == 'true'
+MIRROR_SYNC_MINUTES = int(os.getenv('MIRROR_SYNC_MINUTES', 5))
+
+# Minimum seconds between job index rebuilds triggered by lookup misses, so
+# requests for unknown job IDs can't use up the Sheets read quota
+JOB_INDEX_MIN_REBUILD_SECONDS = int(os.getenv('JOB_INDEX_MIN_REBUILD_SECONDS', 30))
+
+# Incremental calendar reconciliation interval (minutes); 0 disables it
+CALENDAR_SYNC_INTERVAL_MINUTES = int(os.getenv('CALENDAR_SYNC_INTERVAL_MINUTES', 0))
+
+# Rendered form pages kept in memory per process (LRU), invalidated on submit
+FORM_CACHE_SIZE = int(os.getenv('FORM_CACHE_SIZE', 256))
+FORM_CACHE_TTL_SECONDS = int(os.getenv('FORM_CACHE_TTL_SECONDS', 300))
+
+# Results of /submit kept by idempotency key, so repeats return the first result
+SUBMIT_IDEMPOTENCY_TTL_SECONDS = int(os.getenv('SUBMIT_IDEMPOTENCY_TTL_SECONDS', 3600))
+SUBMIT_IDEMPOTENCY_MAX_KEYS = int(os.getenv('SUBMIT_IDEMPOTENCY_MAX_KEYS', 1024))
+
+# ASGI serving mode (asgi.py): pooled async connections to Google, and threads
+# for the routes that still run on the Flask app
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', 100))
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 8))
+
+# Evening reminder checks for unsubmitted job reports (LA time): cron hour
+# expression and minutes between checks
+REMINDER_HOURS = os.getenv('REMINDER_HOURS', '18-22')
+REMINDER_INTERVAL_MINUTES = int(os.getenv('REMINDER_INTERVAL_MINUTES', 15))
+
+# 'all': web workers serve HTTP and one of them runs the scheduler.
+# 'web': HTTP only; run `python scheduler.py` as a separate process for the jobs.
+PROCESS_ROLE = os.getenv('PROCESS_ROLE', 'all').lower()
+
+# Warm up each web worker (credentials, Sheets client, job lookup, templates)
+# before it accepts traffic; see gunicorn.conf.py
+WARM_UP_ON_START = os.getenv('WARM_UP_ON_START', 'false').lower() == 'true'
+
+# Only the gunicorn worker holding this lock file runs the scheduler; the others
+# retry every SCHEDULER_LEADER_RETRY_SECONDS and take over if it exits
+SCHEDULER_LOCK_PATH = os.getenv('SCHEDULER_LOCK_PATH', os.path.join('data', 'scheduler.lock'))
+SCHEDULER_LEADER_RETRY_SECONDS = int(os.getenv('SCHEDULER_LEADER_RETRY_SECONDS', 30))
+
+# One lock file per sheet tab, so row inserts and job row updates in different
+# processes (workers, scheduler) never interleave on the same tab
+SHEET_LOCK_DIR = os.getenv('SHEET_LOCK_DIR', os.path.join('data', 'locks'))
+
+# Threads for prepopulate: date buckets and per-event calendar writes run in parallel
+PREPOPULATE_WORKERS = int(os.getenv('PREPOPULATE_WORKERS', 4))
+
+# Client-side Google API rate limits (requests per minute), matching the per-user quotas.
+# Sheets counts reads and writes separately.
+SHEETS_READS_PER_MINUTE = int(os.getenv('SHEETS_READS_PER_MINUTE', 60))
+SHEETS_WRITES_PER_MINUTE = int(os.getenv('SHEETS_WRITES_PER_MINUTE', 60))
+CALENDAR_REQUESTS_PER_MINUTE = int(os.getenv('CALENDAR_REQUESTS_PER_MINUTE', 600))
+
+# Retries for rate-limited / failed Google API calls (jittered exponential backoff)
+GOOGLE_API_MAX_ATTEMPTS = int(os.getenv('GOOGLE_API_MAX_ATTEMPTS', 5))
+GOOGLE_API_BACKOFF_MAX_SECONDS = float(os.getenv('GOOGLE_API_BACKOFF_MAX_SECONDS', 32))
+
 # Email Configuration
 TARGET_EMAIL = 'info@splendidmoving.com'
 
@@ -0,0 +1,13 @@
+# Gunicorn loads this file from the working directory on startup.
+# Command-line flags in the Procfile (bind, workers, threads) still apply.
+
+
+def post_worker_init(worker):
+    """Runs in each worker after it has imported app.py and before it accepts requests."""
+    import config
+    if config.WARM_UP_ON_START:
+        from gunicorn.workers.gthread import ThreadWorker
+        from app import warm_up
+        # A threaded worker serves requests on its pool threads, not on this one;
+        # a sync worker serves them here and keeps the client warm-up builds
+        warm_up(request_threads=worker.cfg.threads if isinstance(worker, ThreadWorker) else 0)
@@ -8,54 +8,71 @@ Run daily at 9 AM to:
 """
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from services.calendar import get_todays_jobs, get_tomorrows_jobs, get_yesterdays_jobs, update_event_description
+from services.calendar import (get_jobs_in_range, get_changed_jobs, load_sync_token, save_sync_token,
+                               update_event_description, update_event_descriptions)
 from services.sheets import SheetsService
 from utils.logger import log_info, log_error, log_warning
+import config
 
 
-def process_jobs(jobs, date_str, base_url, sheets, label=""):
+def process_jobs(jobs, date_str, base_url, sheets, label="", calendar_pool=None):
     """
     Process a list of calendar jobs:
     - Skip if already in Google Sheets (duplicate check)
     - Create a blank row in the correct monthly sheet
     - Add a form URL to the calendar event description
 
-    Returns the number of newly added jobs.
+    Jobs carrying their own 'date' (as returned by get_jobs_in_range) use it,
+    so one call can cover many dates; others use date_str.
+
+    All new rows are written with one bulk Sheets update per monthly tab, and the
+    form links go to Calendar through batch HTTP requests. Events the batch
+    missed are retried one by one, in parallel on calendar_pool if given.
+    Returns the number of newly added jobs. Raises if the rows could not be
+    written, so callers never count the jobs as handled.
     """
-    from datetime import datetime as _dt
     added = 0
 
-    # Derive the target sheet name so we only search that one tab
-    job_date = _dt.strptime(date_str, "%Y-%m-%d")
-    target_sheet = job_date.strftime("%b %Y")
+    try:
+        created = set(sheets.create_job_rows([
+            (job.get('date') or date_str, job['id'], job['summary'], job.get('source', 'Other'))
+            for job in jobs
+        ]))
+    except Exception as e:
+        log_error(f"[{label}] Failed to create rows for {date_str or 'range'}: {e}")
+        raise
+
+    # Form URLs for the new rows, written to Calendar in batches
+    form_urls = {
+        job['id']: f"{base_url}/?job_id={job['id']}&date={job.get('date') or date_str}"
+        for job in jobs if job['id'] in created
+    }
+    results = update_event_descriptions(form_urls) if form_urls else {}
+
+    # Retry events the batch could not update on their own
+    retry_ids = [job_id for job_id in form_urls if not results.get(job_id)]
+    if retry_ids:
+        if calendar_pool:
+            retried = calendar_pool.map(lambda job_id: update_event_description(job_id, form_urls[job_id]), retry_ids)
+        else:
+            retried = (update_event_description(job_id, form_urls[job_id]) for job_id in retry_ids)
+        results.update(zip(retry_ids, retried))
 
     for job in jobs:
         try:
             job_id = job['id']
             summary = job['summary']
-            source = job.get('source', 'Other')
 
-            # Check if job already exists — scoped to the target month's sheet only
-            existing_row, _, _ = sheets.get_job_by_id(job_id, sheet_name=target_sheet)
-            if existing_row:
+            if job_id not in created:
                 log_info(f"[{label}] Job {job_id} already in sheet. Skipping.")
                 continue
 
-            # Create blank row in Sheets
-            sheets.create_job_row(
-                date_str=date_str,
-                job_id=job_id,
-                summary=summary,
-                source=source
-            )
-
-            # Generate form URL
-            form_url = f"{base_url}/?job_id={job_id}&date={date_str}"
-
-            # Update calendar event with form URL
-            update_event_description(job_id, form_url)
+            if not results.get(job_id):
+                log_warning(f"[{label}] Could not add form URL to calendar event {job_id}")
 
             log_info(f"[{label}] Pre-populated job: {summary}")
             added += 1
@@ -75,56 +92,98 @@ def main():
     la_tz = ZoneInfo('America/Los_Angeles')
     sheets = SheetsService()
 
-    # ── 1. Pre-populate tomorrow's jobs ──────────────────────────
-    tomorrow = datetime.now(la_tz) + timedelta(days=1)
-    tomorrow_str = tomorrow.strftime("%Y-%m-%d")
+    now = datetime.now(la_tz)
+    yesterday_str = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    today_str = now.strftime("%Y-%m-%d")
+    tomorrow_str = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    # One calendar query covers all three days; events are split by LA-local date
+    jobs_by_date = get_jobs_in_range(yesterday_str, tomorrow_str)
+
+    # Tomorrow is pre-populated, today and yesterday are reconciled (backfill
+    # anything missed). The three dates run concurrently; writes to a shared
+    # monthly tab are serialized by SheetsService's per-tab lock.
+    buckets = [("tomorrow", tomorrow_str), ("today", today_str), ("yesterday", yesterday_str)]
+
+    with ThreadPoolExecutor(max_workers=config.PREPOPULATE_WORKERS, thread_name_prefix='calendar') as calendar_pool, \
+            ThreadPoolExecutor(max_workers=len(buckets), thread_name_prefix='bucket') as bucket_pool:
+        futures = [
+            (label, date_str, bucket_pool.submit(
+                run_bucket, label, date_str, jobs_by_date[date_str], base_url, sheets, calendar_pool))
+            for label, date_str in buckets
+        ]
+        timings = []
+        for label, date_str, future in futures:
+            try:
+                found, added, elapsed = future.result()
+                timings.append(f"{label} {elapsed:.2f}s ({added}/{found} added)")
+            except Exception as e:
+                log_error(f"[{label}] Bucket for {date_str} failed: {e}", exc_info=True)
+                timings.append(f"{label} failed")
+
+    log_info(f"Bucket timings: {', '.join(timings)}")
+    log_info("Pre-population + reconciliation complete.")
+
 
-    log_info(f"Pre-populating jobs for tomorrow: {tomorrow_str}")
-    tomorrow_jobs = get_tomorrows_jobs()
+def run_bucket(label, date_str, jobs, base_url, sheets, calendar_pool=None):
+    """Processes one date's jobs. Returns (found, added, elapsed_seconds)."""
+    started = time.perf_counter()
+    if not jobs:
+        log_info(f"[{label}] No jobs found for {date_str} in calendar.")
+        return 0, 0, time.perf_counter() - started
 
-    if tomorrow_jobs:
-        log_info(f"Found {len(tomorrow_jobs)} jobs for tomorrow")
-        added = process_jobs(tomorrow_jobs, tomorrow_str, base_url, sheets, label="tomorrow")
-        log_info(f"Tomorrow: {added} new jobs added, {len(tomorrow_jobs) - added} already existed")
+    log_info(f"[{label}] Found {len(jobs)} jobs for {date_str} in calendar")
+    added = process_jobs(jobs, date_str, base_url, sheets, label=label, calendar_pool=calendar_pool)
+    elapsed = time.perf_counter() - started
+    if added > 0:
+        log_info(f"[{label}] {added} new jobs added, {len(jobs) - added} already in sheet ({elapsed:.2f}s)")
     else:
-        log_info("No jobs found for tomorrow.")
+        log_info(f"[{label}] All jobs already in sheet ✓ ({elapsed:.2f}s)")
+    return len(jobs), added, elapsed
 
-    # ── 2. Reconcile today's jobs ─────────────────────────────────
-    today = datetime.now(la_tz)
-    today_str = today.strftime("%Y-%m-%d")
 
-    log_info(f"Reconciling today's jobs for: {today_str}")
-    today_jobs = get_todays_jobs()
+def reconcile_changes():
+    """
+    Incremental reconciliation: processes only calendar events changed since the
+    last run (via the stored Calendar sync token), limited to the same
+    yesterday → tomorrow window as main(). Cheap enough to run every few minutes.
+    """
+    base_url = os.getenv('BASE_URL', 'http://localhost:5001')
+    la_tz = ZoneInfo('America/Los_Angeles')
+    sheets = SheetsService()
 
-    if today_jobs:
-        log_info(f"Found {len(today_jobs)} jobs for today in calendar")
-        added = process_jobs(today_jobs, today_str, base_url, sheets, label="today")
-        if added > 0:
-            log_info(f"Today reconciliation: {added} missing jobs backfilled")
-        else:
-            log_info("Today reconciliation: all jobs already in sheet ✓")
-    else:
-        log_info("No jobs found for today in calendar.")
+    now = datetime.now(la_tz)
+    yesterday_str = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    tomorrow_str = (now + timedelta(days=1)).strftime("%Y-%m-%d")
 
-    # ── 3. Reconcile yesterday's jobs ────────────────────────────
-    yesterday = datetime.now(la_tz) - timedelta(days=1)
-    yesterday_str = yesterday.strftime("%Y-%m-%d")
+    jobs, cancelled_ids, next_token = get_changed_jobs(load_sync_token(), initial_date_str=yesterday_str)
+    log_info(f"Incremental sync: {len(jobs)} changed jobs, {len(cancelled_ids)} cancelled events")
 
-    log_info(f"Reconciling yesterday's jobs for: {yesterday_str}")
-    yesterday_jobs = get_yesterdays_jobs()
+    jobs_by_date = {}
+    for job in jobs:
+        if yesterday_str <= job['date'] <= tomorrow_str:
+            jobs_by_date.setdefault(job['date'], []).append(job)
 
-    if yesterday_jobs:
-        log_info(f"Found {len(yesterday_jobs)} jobs for yesterday in calendar")
-        added = process_jobs(yesterday_jobs, yesterday_str, base_url, sheets, label="yesterday")
+    failed = []
+    for date_str, date_jobs in sorted(jobs_by_date.items()):
+        try:
+            added = process_jobs(date_jobs, date_str, base_url, sheets, label=f"sync {date_str}")
+        except Exception:
+            failed.append(date_str)  # Already logged by process_jobs
+            continue
         if added > 0:
-            log_info(f"Yesterday reconciliation: {added} missing jobs backfilled")
-        else:
-            log_info("Yesterday reconciliation: all jobs already in sheet ✓")
-    else:
-        log_info("No jobs found for yesterday in calendar.")
+            log_info(f"Incremental sync: {added} new jobs added for {date_str}")
 
-    log_info("Pre-population + reconciliation complete.")
+    # Only advance the token once the delta has been applied; otherwise the next
+    # run fetches the same changes again (rows already written are skipped then)
+    if failed:
+        log_warning(f"Incremental sync: rows for {', '.join(failed)} not written; keeping the previous sync token")
+        return
+    save_sync_token(next_token)
 
 
 if __name__ == "__main__":
     main()
+    # Standalone run: don't let the process exit with a dashboard refresh pending
+    from services.dashboard import dashboard_refresher
+    dashboard_refresher.flush()
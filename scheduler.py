@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Scheduler process role
+
+Runs the timed jobs (9 AM prepopulate, evening reminders, mirror and calendar
+sync) and serves no HTTP. By default (PROCESS_ROLE=all) app.py starts this
+scheduler inside one elected web worker. With PROCESS_ROLE=web the web
+processes skip it, and this script runs the jobs instead:
+
+    python scheduler.py
+"""
+
+import os
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from apscheduler.schedulers.background import BackgroundScheduler
+from prepopulate import main as prepopulate_job, reconcile_changes
+from services.sheets import SheetsService
+from utils.leader import LeaderLock
+from utils.logger import log_info, log_error, log_warning, log_context
+from utils.metrics import observe_job
+import config
+
+# Held by the one process on this host that runs the jobs
+scheduler_lock = LeaderLock(config.SCHEDULER_LOCK_PATH)
+
+def run_prepopulate_job():
+    """Wrapper to ensure scheduler job is logged properly."""
+    with log_context(task='prepopulate_job'):
+        log_info("⏰ SCHEDULED JOB TRIGGERED: prepopulate_job starting...")
+        try:
+            with observe_job('prepopulate_job'):
+                prepopulate_job()
+            log_info("✅ SCHEDULED JOB COMPLETED: prepopulate_job finished successfully")
+        except Exception as e:
+            log_error(f"❌ SCHEDULED JOB FAILED: prepopulate_job crashed: {e}", exc_info=True)
+
+def run_calendar_sync_job():
+    """Incremental reconciliation of calendar changes since the last run."""
+    with log_context(task='calendar_sync_job'):
+        try:
+            with observe_job('calendar_sync_job'):
+                reconcile_changes()
+        except Exception as e:
+            log_error(f"Calendar sync job failed: {e}", exc_info=True)
+
+def run_mirror_sync_job():
+    """Re-syncs the local job mirror from Google Sheets (picks up manual edits)."""
+    with log_context(task='mirror_sync_job'):
+        try:
+            with observe_job('mirror_sync_job'):
+                SheetsService().sync_mirror()
+        except Exception as e:
+            log_error(f"Mirror sync job failed: {e}", exc_info=True)
+
+def send_reminder_job():
+    """
+    Evening check for today's jobs that still have no report, every
+    REMINDER_INTERVAL_MINUTES during REMINDER_HOURS. Names each missing job.
+    """
+    with log_context(task='reminder_job'):
+        try:
+            with observe_job('reminder_job'):
+                la_tz = ZoneInfo('America/Los_Angeles')
+                today_str = datetime.now(la_tz).strftime("%Y-%m-%d")
+
+                missing = SheetsService().get_missing_reports(today_str)
+                if missing:
+                    jobs = ", ".join(f"{job_id} ({summary})" if summary else job_id for job_id, summary in missing)
+                    log_warning(f"{len(missing)} report(s) for {today_str} still missing: {jobs}",
+                                date=today_str, missing_job_ids=[job_id for job_id, _ in missing])
+                    # Note: Email reminders now handled by Make.com
+                    # If you want to re-enable, import and call send_email here
+                else:
+                    log_info(f"No reports missing for {today_str}. Skipping reminder.")
+        except Exception as e:
+            log_error(f"Error in send_reminder_job: {e}")
+
+def start_scheduler():
+    try:
+        # Check if scheduler is already running or if we are in a reloader child process to avoid double run
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            return
+
+        scheduler = BackgroundScheduler()
+        
+        # Determine strict timezone
+        la_tz = ZoneInfo('America/Los_Angeles')
+        
+        # Add job: Daily at 9:00 AM LA time (Pre-populate tomorrow's jobs)
+        scheduler.add_job(
+            run_prepopulate_job, 
+            'cron', 
+            hour=9, 
+            minute=0, 
+            timezone=la_tz,
+            id='prepopulate_job',
+            replace_existing=True
+        )
+
+        # Add job: Evening reminder checks for missing reports (LA time)
+        scheduler.add_job(
+            send_reminder_job,
+            'cron', 
+            hour=config.REMINDER_HOURS, 
+            minute=f"*/{config.REMINDER_INTERVAL_MINUTES}", 
+            timezone=la_tz,
+            id='reminder_job',
+            replace_existing=True
+        )
+        
+        # Keep the local job mirror in line with Sheets; first sync runs right away
+        if config.MIRROR_ENABLED:
+            scheduler.add_job(
+                run_mirror_sync_job,
+                'interval',
+                minutes=config.MIRROR_SYNC_MINUTES,
+                next_run_time=datetime.now(la_tz),
+                id='mirror_sync_job',
+                replace_existing=True
+            )
+
+        # Optional: frequent incremental reconciliation using Calendar sync tokens
+        if config.CALENDAR_SYNC_INTERVAL_MINUTES > 0:
+            scheduler.add_job(
+                run_calendar_sync_job,
+                'interval',
+                minutes=config.CALENDAR_SYNC_INTERVAL_MINUTES,
+                id='calendar_sync_job',
+                replace_existing=True
+            )
+            log_info(f"Calendar sync enabled every {config.CALENDAR_SYNC_INTERVAL_MINUTES} minutes")
+
+        scheduler.start()
+        log_info(f"✅ Internal Scheduler Started: Pre-populate at 9AM, Reminder checks every {config.REMINDER_INTERVAL_MINUTES} min during hours {config.REMINDER_HOURS} (LA time)")
+        
+        # Print next run time for verification
+        jobs = scheduler.get_jobs()
+        if jobs:
+            print(f"Next scheduled run: {jobs[0].next_run_time}")
+            
+    except Exception as e:
+        log_error(f"Failed to start scheduler: {e}")
+
+def start_when_leader():
+    """Starts the scheduler now if this process wins the scheduler lock, or later if it takes over."""
+    scheduler_lock.run_when_leader(start_scheduler, config.SCHEDULER_LEADER_RETRY_SECONDS)
+
+
+def main():
+    log_info(f"Scheduler process starting (pid {os.getpid()})")
+    start_when_leader()
+    try:
+        # The scheduler and the leader election run on daemon threads
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        log_info("Scheduler process stopped")
+
+
+if __name__ == "__main__":
+    main()
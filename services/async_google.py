@@ -0,0 +1,183 @@
+"""
+Non-blocking access to the Google Sheets REST API for the ASGI serving mode
+(asgi.py). Requests share the service account credentials, quotas, retry
+policy and metrics of the sync clients in services.auth, but go over one
+pooled httpx.AsyncClient, so hundreds of form loads can wait on Google at
+once without holding a thread each.
+
+Requires httpx (see requirements-asgi.txt).
+"""
+
+import asyncio
+import json
+from urllib.parse import quote
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import config
+from services.auth import credential_manager, get_creds, quota_for, reserve_quota, retry_delay
+from services.job_index import job_index
+from services.mirror import job_mirror
+from services.sheets import SheetsService, job_index_entries, sheet_metadata
+from utils.metrics import observe_api_call
+
+SHEETS_URL = 'https://sheets.googleapis.com/v4/spreadsheets'
+
+
+class AsyncGoogleClient:
+    """
+    Minimal async client for the Sheets endpoints the form page reads.
+    transport can be swapped (e.g. benchmarks/fake_google.py) for testing.
+    """
+
+    def __init__(self, transport=None, max_connections=config.ASYNC_HTTP_MAX_CONNECTIONS, timeout=30.0):
+        import httpx
+        self._httpx = httpx
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections),
+        )
+        self._authorize = transport is None
+        self._creds = None
+        # Single-flight for index rebuilds: a burst of misses triggers one batchGet
+        self.index_lock = asyncio.Lock()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def sheets_get(self, fields):
+        return await self._request(
+            'sheets.spreadsheets.get', 'GET', f"{SHEETS_URL}/{config.TARGET_SPREADSHEET_ID}",
+            params={'fields': fields})
+
+    async def sheets_values_get(self, range_name):
+        return await self._request(
+            'sheets.spreadsheets.values.get', 'GET',
+            f"{SHEETS_URL}/{config.TARGET_SPREADSHEET_ID}/values/{quote(range_name, safe='')}")
+
+    async def sheets_values_batch_get(self, ranges):
+        return await self._request(
+            'sheets.spreadsheets.values.batchGet', 'GET',
+            f"{SHEETS_URL}/{config.TARGET_SPREADSHEET_ID}/values:batchGet",
+            params=[('ranges', r) for r in ranges])
+
+    async def _headers(self):
+        if not self._authorize:
+            return {}
+        if self._creds is None:
+            # First use loads the key file and fetches a token: keep that off the loop
+            self._creds = await asyncio.to_thread(get_creds)
+        # The CredentialManager's refresher thread normally keeps the token fresh
+        if not self._creds.valid:
+            await asyncio.to_thread(credential_manager.refresh_now)
+        return {'Authorization': f"Bearer {self._creds.token}"}
+
+    async def _request(self, method_id, http_method, url, params=None, body=None):
+        """
+        Sends one REST call with the same quota, backoff and metrics as the sync
+        clients' GoogleHttpRequest. Errors are raised as googleapiclient HttpErrors.
+        """
+        api = method_id.split('.', 1)[0]
+        quota = quota_for(api, http_method)
+        attempt = 1
+        while True:
+            delay = reserve_quota(quota)
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                with observe_api_call(api, method_id):
+                    return await self._send(http_method, url, params, body)
+            except Exception as e:
+                delay = retry_delay(e, http_method, attempt) if attempt < config.GOOGLE_API_MAX_ATTEMPTS else None
+                if delay is None:
+                    raise
+                print(f"⚠️ {method_id} failed (attempt {attempt}/{config.GOOGLE_API_MAX_ATTEMPTS}): {e}. Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _send(self, http_method, url, params, body):
+        try:
+            response = await self._client.request(
+                http_method, url, params=params, json=body, headers=await self._headers())
+        except self._httpx.TransportError as e:
+            # Same retry treatment as a dropped connection on the sync client
+            raise ConnectionError(str(e)) from e
+
+        if response.status_code >= 400:
+            resp = httplib2.Response({'status': str(response.status_code), **dict(response.headers)})
+            resp.reason = response.reason_phrase
+            raise HttpError(resp, response.content, uri=str(response.url))
+        return json.loads(response.content) if response.content else {}
+
+
+async def find_job(client, job_id):
+    """
+    Async counterpart of SheetsService.get_job_by_id for the form page.
+    Mirror first (local SQLite, no API call), then the job index with a single
+    verified row read, rebuilding the index with one batchGet on a miss.
+    Returns (row_number, row_data, sheet_name) or (None, None, None).
+    """
+    sheets = SheetsService()
+    # SQLite calls block, so they run on a worker thread rather than the event loop
+    found = await asyncio.to_thread(_mirror_lookup, sheets, job_id)
+    if found:
+        return found
+
+    location = job_index.get(job_id)
+    found = await _read_indexed_job(client, sheets, job_id)
+    if not found:
+        async with client.index_lock:
+            # Skip the rebuild if another request already did one while we waited,
+            # or if the ID is unknown and the index too fresh to rebuild again
+            # (see SheetsService._find_job)
+            if job_index.get(job_id) == location and (
+                    location or job_index.rebuild_due(config.JOB_INDEX_MIN_REBUILD_SECONDS)):
+                await _build_job_index(client)
+        if job_index.get(job_id) != location:
+            found = await _read_indexed_job(client, sheets, job_id)
+    return found or (None, None, None)
+
+
+def _mirror_lookup(sheets, job_id):
+    if not sheets.mirror_ready():
+        return None
+    try:
+        return job_mirror.get(job_id)
+    except Exception as e:
+        print(f"Mirror lookup failed, reading from Sheets: {e}")
+        return None
+
+
+async def _read_indexed_job(client, sheets, job_id):
+    location = job_index.get(job_id)
+    if not location:
+        return None
+
+    sheet_name, row_num = location
+    result = await client.sheets_values_get(f"'{sheet_name}'!A{row_num}:I{row_num}")
+    rows = result.get('values', [])
+    row = rows[0] if rows else []
+    if len(row) > 1 and row[1] == job_id:
+        await asyncio.to_thread(sheets.remember_row, sheet_name, row_num, row)
+        return (row_num, row, sheet_name)
+    return None
+
+
+async def _build_job_index(client):
+    sheet_ids = sheet_metadata.peek()
+    if sheet_ids is None:
+        spreadsheet = await client.sheets_get('sheets.properties(title,sheetId)')
+        sheet_ids = {s['properties']['title']: s['properties']['sheetId'] for s in spreadsheet.get('sheets', [])}
+        sheet_metadata.store(sheet_ids)
+
+    titles = [t for t in sheet_ids if t != 'Summary']
+    generations = job_index.generations()
+    entries = {}
+    if titles:
+        result = await client.sheets_values_batch_get([f"'{t}'!B:B" for t in titles])
+        entries = job_index_entries(titles, result.get('valueRanges', []))
+
+    job_index.load(entries, generations)
+    print(f"Job index built: {len(entries)} jobs across {len(titles)} sheets")
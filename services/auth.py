@@ -1,14 +1,37 @@
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from utils.metrics import metrics, observe_api_call
+from utils.rate_limit import TokenBucket, backoff_delay, parse_retry_after
 import config
 import os
 import json
+import threading
+import time
+from datetime import datetime, timezone
 
-def get_creds():
+# google-auth and googleapiclient are imported on first use: they are most of the
+# import cost of a web worker, and a cached form page never needs them.
+
+# Per-thread cache of built API clients: {(api_name, api_version): service}
+# httplib2 is not thread-safe, so each gunicorn/scheduler thread gets its own
+# client and keeps reusing its connection instead of calling build() per request.
+_thread_clients = threading.local()
+
+# Clients built ahead of traffic (warm-up) that no thread owns yet:
+# {(api_name, api_version): [service, ...]}. A thread's first get_service takes
+# one from here before building its own. Each client is only ever used by the
+# thread that took it, so handing it over once is safe.
+_prebuilt_clients = {}
+_prebuilt_lock = threading.Lock()
+
+# Optional replacement backend: factory(api_name, api_version) -> service object.
+# Used to run the app against the in-process fake in benchmarks/fake_google.py.
+_service_factory = None
+
+def load_creds():
     """
     Load Google Service Account credentials.
     Supports both local file and Railway environment variable.
     """
+    from google.oauth2 import service_account
     try:
         # Check if running on Railway (env var set)
         raw_env = os.getenv('SERVICE_ACCOUNT_JSON')
@@ -37,14 +60,250 @@ def get_creds():
         print(f"Error loading credentials: {e}")
         raise
 
+
+class CredentialManager:
+    """
+    Holds the one set of service account credentials for this process.
+    The access token is fetched on first use and then refreshed by a daemon thread
+    shortly before it expires, so API calls never wait on an OAuth exchange.
+    """
+
+    def __init__(self, refresh_margin=config.TOKEN_REFRESH_MARGIN_SECONDS, retry_delay=30):
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._creds = None
+        self._refresher = None
+
+    def get_credentials(self):
+        with self._lock:
+            if self._creds is None:
+                self._creds = load_creds()
+                try:
+                    self._refresh_locked()
+                except Exception as e:
+                    # Not fatal: the HTTP transport refreshes on demand if needed
+                    print(f"Initial token fetch failed: {e}")
+                self._start_refresher()
+            return self._creds
+
+    def refresh_now(self):
+        """Fetches a new access token right away (e.g. the current one expired)."""
+        with self._lock:
+            self._refresh_locked()
+        return self._creds
+
+    def _refresh_locked(self):
+        from google.auth.transport.requests import Request
+        self._creds.refresh(Request())
+
+    def _seconds_until_refresh(self):
+        expiry = self._creds.expiry
+        if not expiry:
+            return 0
+        # google-auth keeps expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (expiry - now).total_seconds() - self.refresh_margin
+
+    def _start_refresher(self):
+        if self._refresher and self._refresher.is_alive():
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name='token-refresher', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            with self._lock:
+                wait = self._seconds_until_refresh()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                with self._lock:
+                    self._refresh_locked()
+            except Exception as e:
+                print(f"Background token refresh failed: {e}. Retrying in {self.retry_delay}s...")
+                time.sleep(self.retry_delay)
+
+
+# One credential set (and one cached token) shared by every client in this process
+credential_manager = CredentialManager()
+
+def get_creds():
+    """Returns the shared, proactively refreshed service account credentials."""
+    return credential_manager.get_credentials()
+
 def get_service(api_name, api_version, creds=None):
     """
     Returns an authenticated service object.
+    Clients are built once per thread and reused, which skips discovery parsing
+    and TLS setup on later calls. Passing explicit creds always builds a new client.
     """
-    if not creds:
-        creds = get_creds()
-    
+    if _service_factory:
+        return _service_factory(api_name, api_version)
+
+    if creds:
+        return _build_service(api_name, api_version, creds)
+
+    clients = getattr(_thread_clients, 'clients', None)
+    if clients is None:
+        clients = _thread_clients.clients = {}
+
+    key = (api_name, api_version)
+    if key not in clients:
+        with _prebuilt_lock:
+            pool = _prebuilt_clients.get(key)
+            service = pool.pop() if pool else None
+        clients[key] = service or _build_service(api_name, api_version, get_creds())
+    return clients[key]
+
+def prebuild_clients(api_name, api_version, count):
+    """
+    Builds `count` clients for threads that have not called get_service yet,
+    e.g. a worker's request threads during warm-up. No-op with a service factory.
+    """
+    if _service_factory or count <= 0:
+        return
+    creds = get_creds()
+    built = [_build_service(api_name, api_version, creds) for _ in range(count)]
+    with _prebuilt_lock:
+        _prebuilt_clients.setdefault((api_name, api_version), []).extend(built)
+
+def release_thread_clients():
+    """
+    Hands this thread's clients to the prebuilt pool, for a thread that is done
+    calling Google (the warm-up thread) so another thread can use them.
+    """
+    clients = getattr(_thread_clients, 'clients', None) or {}
+    _thread_clients.clients = {}
+    with _prebuilt_lock:
+        for key, service in clients.items():
+            _prebuilt_clients.setdefault(key, []).append(service)
+
+# One token bucket per quota, shared by every thread in the process
+_limiters = {
+    'sheets.read': TokenBucket(config.SHEETS_READS_PER_MINUTE),
+    'sheets.write': TokenBucket(config.SHEETS_WRITES_PER_MINUTE),
+    'calendar': TokenBucket(config.CALENDAR_REQUESTS_PER_MINUTE),
+}
+
+# Server errors and dropped connections are only retried for requests that are
+# safe to repeat; a POST (append, insertDimension...) might already have applied.
+_IDEMPOTENT_METHODS = {'GET', 'PUT', 'PATCH', 'DELETE'}
+_RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+def reserve_quota(quota, tokens=1):
+    """
+    Takes `tokens` requests from the named quota ('sheets.read', 'sheets.write',
+    'calendar') and returns how many seconds to wait before sending them.
+    """
+    limiter = _limiters.get(quota)
+    if not limiter:
+        return 0.0
+    delay = limiter.reserve(tokens)
+    if delay:
+        metrics.record_throttle(quota, delay)
+    return delay
+
+def reset_quotas():
+    """Refills every quota bucket, e.g. between benchmark runs that share a process."""
+    for quota, limiter in list(_limiters.items()):
+        _limiters[quota] = TokenBucket(limiter.rate * 60, limiter.capacity)
+
+def wait_for_quota(quota, tokens=1):
+    """Blocks until `tokens` requests fit in the named quota."""
+    delay = reserve_quota(quota, tokens)
+    if delay:
+        time.sleep(delay)
+
+def quota_for(api, http_method):
+    if api == 'sheets':
+        return 'sheets.read' if http_method == 'GET' else 'sheets.write'
+    return api
+
+def retry_delay(error, http_method, attempt):
+    """Seconds to wait before retrying after `error`, or None if it should not be retried."""
+    from googleapiclient.errors import HttpError
+    delay = backoff_delay(attempt, cap=config.GOOGLE_API_BACKOFF_MAX_SECONDS)
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        if _is_rate_limited(error):
+            retry_after = parse_retry_after(error.resp.get('retry-after'))
+            return max(delay, retry_after) if retry_after is not None else delay
+        if status in _RETRYABLE_STATUSES and http_method in _IDEMPOTENT_METHODS:
+            return delay
+        return None
+    if isinstance(error, OSError) and http_method in _IDEMPOTENT_METHODS:
+        # Connection resets, timeouts, TLS errors
+        return delay
+    return None
+
+def _is_rate_limited(error):
+    # Sheets answers 429; Calendar uses 403 with a rate-limit reason
+    if error.resp.status == 429:
+        return True
+    details = getattr(error, 'error_details', None)
+    if error.resp.status != 403 or not isinstance(details, list):
+        return False
+    return any(
+        isinstance(d, dict) and d.get('reason') in ('rateLimitExceeded', 'userRateLimitExceeded')
+        for d in details
+    )
+
+def execute_request(method, http_method, send):
+    """
+    Sends one API request with send(): waits for its quota's token bucket,
+    retries rate limits (honoring Retry-After) and transient failures with
+    jittered exponential backoff, and records every attempt in utils.metrics.
+    `method` is the API method id, e.g. 'sheets.spreadsheets.values.get'.
+    """
+    api = method.split('.', 1)[0]
+    quota = quota_for(api, http_method)
+    attempt = 1
+    while True:
+        wait_for_quota(quota)
+        try:
+            with observe_api_call(api, method):
+                return send()
+        except Exception as e:
+            delay = retry_delay(e, http_method, attempt) if attempt < config.GOOGLE_API_MAX_ATTEMPTS else None
+            if delay is None:
+                raise
+            print(f"⚠️ {method} failed (attempt {attempt}/{config.GOOGLE_API_MAX_ATTEMPTS}): {e}. Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            attempt += 1
+
+_request_class = None
+
+def _google_http_request():
+    """Returns GoogleHttpRequest, defining it on first use (see the note on imports above)."""
+    global _request_class
+    if _request_class is not None:
+        return _request_class
+
+    from googleapiclient.http import HttpRequest
+
+    class GoogleHttpRequest(HttpRequest):
+        """HttpRequest used by every client from get_service; execute() goes through execute_request."""
+
+        def execute(self, http=None, num_retries=0):
+            return execute_request(self.methodId or self.method, self.method,
+                                   lambda: HttpRequest.execute(self, http=http, num_retries=num_retries))
+
+    _request_class = GoogleHttpRequest
+    return _request_class
+
+def _build_service(api_name, api_version, creds):
     if not creds:
         raise Exception("Could not authenticate. Check service_account.json.")
 
-    return build(api_name, api_version, credentials=creds)
+    from googleapiclient.discovery import build
+    return build(api_name, api_version, credentials=creds, cache_discovery=False,
+                 requestBuilder=_google_http_request())
+
+def set_service_factory(factory):
+    """
+    Routes every get_service call to factory(api_name, api_version) instead of
+    Google. Pass None to go back to real clients.
+    """
+    global _service_factory
+    _service_factory = factory
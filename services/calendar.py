@@ -1,8 +1,18 @@
+import re
 from datetime import datetime, timedelta, timezone
-from services.auth import get_service
+from services.auth import get_service, wait_for_quota
+from utils.metrics import observe_api_call
 import config
 from zoneinfo import ZoneInfo
 
+# Job classifier patterns, compiled once (every listed event goes through _parse_job)
+_SOURCE_RE = re.compile(r'Source:\s*(.*)', re.IGNORECASE)
+_PARENTHESES_RE = re.compile(r'\s*\(.*?\)')
+_PLUS_SUFFIX_RE = re.compile(r'\s*\+.*')
+_REQUIRED_FIELDS = ('customer:', 'phone:', 'date:')
+# "📋 Form: http..." line we add to event descriptions
+_FORM_LINK_RE = re.compile(r'\n?📋 Form: https?://[^\s]+')
+
 # Color to source mapping
 COLOR_SOURCE_MAP = {
     '6': 'Yelp',        # #ffb878 (orange)
@@ -23,112 +33,268 @@ def get_todays_jobs(date_str=None):
     If date_str is None, uses today.
     Returns a list of simplified event objects with source information.
     """
-    service = get_service('calendar', 'v3')
-
     # Get current time in Los Angeles timezone
     la_tz = ZoneInfo('America/Los_Angeles')
     
     if date_str:
         try:
-            # Parse provided date string (YYYY-MM-DD)
-            # Create a naive datetime then replace with LA tz info
-            dt = datetime.strptime(date_str, "%Y-%m-%d")
-            query_date = dt.replace(tzinfo=la_tz)
+            # Validate provided date string (YYYY-MM-DD)
+            datetime.strptime(date_str, "%Y-%m-%d")
         except ValueError:
             from utils.logger import log_warning
             log_warning(f"Invalid date format: {date_str}, falling back to today")
-            query_date = datetime.now(la_tz)
-    else:
-        query_date = datetime.now(la_tz)
-        
-    start_of_day = query_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = query_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+            date_str = None
+
+    if not date_str:
+        date_str = datetime.now(la_tz).strftime("%Y-%m-%d")
+
+    return get_jobs_in_range(date_str, date_str)[date_str]
+
+
+def get_jobs_in_range(start_date_str, end_date_str):
+    """
+    Fetches all jobs between two dates (inclusive, YYYY-MM-DD, Los Angeles time)
+    with a single paginated events().list query, then splits them by LA-local day.
+    Returns {date_str: [job, ...]} with an entry (possibly empty) for every day in range.
+    Each job also carries its LA-local 'date'.
+    """
+    first_day = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+    last_day = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+
+    jobs_by_date = {}
+    day = first_day
+    while day <= last_day:
+        jobs_by_date[day.strftime("%Y-%m-%d")] = []
+        day += timedelta(days=1)
+
+    for job in iter_jobs_in_range(start_date_str, end_date_str):
+        jobs_by_date[job['date']].append(job)
+
+    return jobs_by_date
+
+
+def iter_jobs_in_range(start_date_str, end_date_str):
+    """
+    Generator version of get_jobs_in_range: yields parsed jobs (with their
+    LA-local 'date') page by page as Calendar returns them, in start-time order.
+    """
+    service = get_service('calendar', 'v3')
+    la_tz = ZoneInfo('America/Los_Angeles')
+
+    first_day = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+    last_day = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+
+    start_of_range = datetime.combine(first_day, datetime.min.time(), tzinfo=la_tz)
+    end_of_range = datetime.combine(last_day, datetime.max.time(), tzinfo=la_tz)
     
     # Convert to UTC for API (Google Calendar API expects UTC)
-    time_min = start_of_day.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
-    time_max = end_of_day.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+    time_min = start_of_range.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+    time_max = end_of_range.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
     
     print(f"Fetching events from {time_min} to {time_max}...")
+
+    for event in _iter_events(service, time_min, time_max):
+        job = _parse_job(event)
+        if not job:
+            continue
+
+        # Bucket by the LA-local start day; events that started before the window
+        # (multi-day moves) count towards its first day
+        job_date = max(_event_start_date(event, la_tz), first_day)
+        job['date'] = job_date.strftime("%Y-%m-%d")
+        yield job
+
+
+def _iter_events(service, time_min, time_max):
+    """
+    Yields every event in the window, fetching the next page (nextPageToken)
+    only once the previous one has been consumed.
+    Rate limits and transient errors are retried by the client (services.auth).
+    """
+    page_token = None
+
+    while True:
+        events_result = service.events().list(
+            calendarId=config.CALENDAR_ID, 
+            timeMin=time_min, 
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy='startTime',
+            pageToken=page_token,
+            fields='nextPageToken,items(id,summary,start,end,location,colorId,description)'
+        ).execute()
+
+        yield from events_result.get('items', [])
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def _event_start_date(event, la_tz):
+    """LA-local calendar date an event starts on (timed or all-day)."""
+    start = event.get('start', {})
+    if 'dateTime' in start:
+        return datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00')).astimezone(la_tz).date()
+    return datetime.strptime(start['date'], "%Y-%m-%d").date()
+
+
+def _parse_job(event):
+    """
+    Turns a calendar event into a job dict, or returns None if it is not a moving job.
+    """
+    summary = event.get('summary', 'Untitled Job')
+    color_id = event.get('colorId', None)
+    description = event.get('description', '')
     
-    import time
-    events_result = {}
-    max_retries = 3
+    # Filter: Only include actual moving jobs (must have "Customer:", "Phone:", "Date:" in description)
+    description_lower = description.lower()
+    if not all(field in description_lower for field in _REQUIRED_FIELDS):
+        print(f"Skipping non-job event: {summary}")
+        return None
     
-    for attempt in range(1, max_retries + 1):
-        try:
-            events_result = service.events().list(
-                calendarId=config.CALENDAR_ID, 
-                timeMin=time_min, 
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime',
-                fields='items(id,summary,start,end,location,colorId,description)'
-            ).execute()
-            break # Success
-        except Exception as e:
-            if attempt < max_retries:
-                print(f"⚠️ Calendar API failed (Attempt {attempt}/{max_retries}): {e}. Retrying...")
-                time.sleep(2)
-            else:
-                print(f"❌ Calendar API failed after {max_retries} attempts.")
-                raise e
+    source = None
     
-    events = events_result.get('items', [])
+    # 1. Try to parse from Description (New Method)
+    # Look for "Source: Value" (case insensitive)
+    source_match = _SOURCE_RE.search(description)
+    if source_match:
+        source_val = source_match.group(1).strip().lower()
+        if 'yelp' in source_val:
+            source = 'Yelp'
+        elif 'local service' in source_val or 'lsa' in source_val:
+            source = 'Google LSA'
+        else:
+            source = 'Other'
+            
+    # 2. Fallback to Color (Legacy Method)
+    if not source:
+        if color_id in config.COLOR_SOURCE_MAP:
+            source = config.COLOR_SOURCE_MAP[color_id]
+        else:
+            source = 'Other'
     
-    import re
+    # Clean up Summary (Customer Name)
+    # Remove anything in parentheses: "Name (info)" -> "Name"
+    # Remove anything after +: "Name + info" -> "Name"
+    clean_summary = _PARENTHESES_RE.sub('', summary)
+    clean_summary = _PLUS_SUFFIX_RE.sub('', clean_summary)
+    clean_summary = clean_summary.strip()
     
+    return {
+        'id': event['id'],
+        'summary': clean_summary,
+        'original_summary': summary, # Keep original just in case
+        'start': event['start'].get('dateTime', event['start'].get('date')),
+        'location': event.get('location', 'No Location'),
+        'colorId': color_id,
+        'source': source
+    }
+
+
+def get_changed_jobs(sync_token=None, initial_date_str=None):
+    """
+    Incremental sync: lists only events changed since sync_token was issued.
+    Without a token (or when Google has expired it) a full sync is done, starting
+    at initial_date_str (YYYY-MM-DD, LA time; default today).
+
+    Returns (jobs, cancelled_ids, next_sync_token). Changed events go through the
+    same job filter and source detection as get_todays_jobs, and each job carries
+    its LA-local 'date'. The caller should persist next_sync_token once it has
+    processed the delta.
+    """
+    from googleapiclient.errors import HttpError
+
+    service = get_service('calendar', 'v3')
+    la_tz = ZoneInfo('America/Los_Angeles')
+
+    if sync_token:
+        try:
+            events, next_token = _list_event_changes(service, sync_token=sync_token)
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            # 410 Gone: token expired or invalidated, start over with a full sync
+            print("Calendar sync token expired. Running full sync...")
+            sync_token = None
+
+    if not sync_token:
+        if initial_date_str:
+            first_day = datetime.strptime(initial_date_str, "%Y-%m-%d").date()
+        else:
+            first_day = datetime.now(la_tz).date()
+        start_of_range = datetime.combine(first_day, datetime.min.time(), tzinfo=la_tz)
+        time_min = start_of_range.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+        events, next_token = _list_event_changes(service, time_min=time_min)
+
     jobs = []
+    cancelled_ids = []
     for event in events:
-        summary = event.get('summary', 'Untitled Job')
-        color_id = event.get('colorId', None)
-        description = event.get('description', '')
-        
-        # Filter: Only include actual moving jobs (must have "Customer:", "Phone:", "Date:" in description)
-        description_lower = description.lower()
-        required_fields = ['customer:', 'phone:', 'date:']
-        if not all(field in description_lower for field in required_fields):
-            print(f"Skipping non-job event: {summary}")
+        if event.get('status') == 'cancelled':
+            cancelled_ids.append(event['id'])
             continue
-        
-        source = None
-        
-        # 1. Try to parse from Description (New Method)
-        # Look for "Source: Value" (case insensitive)
-        source_match = re.search(r'Source:\s*(.*)', description, re.IGNORECASE)
-        if source_match:
-            source_val = source_match.group(1).strip().lower()
-            if 'yelp' in source_val:
-                source = 'Yelp'
-            elif 'local service' in source_val or 'lsa' in source_val:
-                source = 'Google LSA'
-            else:
-                source = 'Other'
-                
-        # 2. Fallback to Color (Legacy Method)
-        if not source:
-            if color_id in config.COLOR_SOURCE_MAP:
-                source = config.COLOR_SOURCE_MAP[color_id]
-            else:
-                source = 'Other'
-        
-        # Clean up Summary (Customer Name)
-        # Remove anything in parentheses: "Name (info)" -> "Name"
-        # Remove anything after +: "Name + info" -> "Name"
-        clean_summary = re.sub(r'\s*\(.*?\)', '', summary)
-        clean_summary = re.sub(r'\s*\+.*', '', clean_summary)
-        clean_summary = clean_summary.strip()
-        
-        jobs.append({
-            'id': event['id'],
-            'summary': clean_summary,
-            'original_summary': summary, # Keep original just in case
-            'start': event['start'].get('dateTime', event['start'].get('date')),
-            'location': event.get('location', 'No Location'),
-            'colorId': color_id,
-            'source': source
-        })
-        
-    return jobs
+
+        job = _parse_job(event)
+        if job:
+            job['date'] = _event_start_date(event, la_tz).strftime("%Y-%m-%d")
+            jobs.append(job)
+
+    return jobs, cancelled_ids, next_token
+
+
+def _list_event_changes(service, sync_token=None, time_min=None):
+    """
+    Pages through events().list in sync mode.
+    Returns (events, nextSyncToken); the token only arrives on the last page.
+    """
+    events = []
+    page_token = None
+
+    while True:
+        params = {
+            'calendarId': config.CALENDAR_ID,
+            'singleEvents': True,
+            'pageToken': page_token,
+            'fields': 'nextPageToken,nextSyncToken,items(id,status,summary,start,end,location,colorId,description)'
+        }
+        # syncToken cannot be combined with timeMin
+        if sync_token:
+            params['syncToken'] = sync_token
+        else:
+            params['timeMin'] = time_min
+
+        events_result = service.events().list(**params).execute()
+
+        events.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return events, events_result.get('nextSyncToken')
+
+
+def load_sync_token(calendar_id=config.CALENDAR_ID):
+    """Returns the stored Calendar sync token for calendar_id, or None."""
+    conn = _sync_token_table()
+    row = conn.execute('SELECT sync_token FROM calendar_sync WHERE calendar_id = ?', (calendar_id,)).fetchone()
+    return row[0] if row else None
+
+
+def save_sync_token(sync_token, calendar_id=config.CALENDAR_ID):
+    """Persists the Calendar sync token for calendar_id (None clears it)."""
+    conn = _sync_token_table()
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO calendar_sync (calendar_id, sync_token, updated_at) VALUES (?, ?, ?)',
+            (calendar_id, sync_token, datetime.now(timezone.utc).isoformat())
+        )
+
+
+def _sync_token_table():
+    from utils.local_db import get_connection
+    conn = get_connection()
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS calendar_sync ('
+        'calendar_id TEXT PRIMARY KEY, sync_token TEXT, updated_at TEXT)'
+    )
+    return conn
 
 
 def get_tomorrows_jobs():
@@ -167,21 +333,10 @@ def update_event_description(event_id, form_url):
             eventId=event_id
         ).execute()
         
-        current_description = event.get('description', '')
-        
-        # Check if form link already exists
-        import re
-        form_link_pattern = r'\n?📋 Form: https?://[^\s]+'
-        
-        if re.search(form_link_pattern, current_description):
-            # Replace existing form link
-            new_description = re.sub(form_link_pattern, f'\n📋 Form: {form_url}', current_description)
-        else:
-            # Append form link
-            new_description = current_description + f'\n\n📋 Form: {form_url}'
+        new_description = _with_form_link(event.get('description', ''), form_url)
         
         # Update event
-        event['description'] = new_description.strip()
+        event['description'] = new_description
         service.events().update(
             calendarId=config.CALENDAR_ID,
             eventId=event_id,
@@ -196,6 +351,90 @@ def update_event_description(event_id, form_url):
         return False
 
 
+def _with_form_link(current_description, form_url):
+    """Returns the description with its form link set to form_url (replaced or appended)."""
+    if _FORM_LINK_RE.search(current_description):
+        # Replace existing form link
+        new_description = _FORM_LINK_RE.sub(f'\n📋 Form: {form_url}', current_description)
+    else:
+        # Append form link
+        new_description = current_description + f'\n\n📋 Form: {form_url}'
+    return new_description.strip()
+
+
+def update_event_descriptions(form_urls, batch_size=50):
+    """
+    Batch version of update_event_description for many events at once.
+    form_urls: {event_id: form_url}
+
+    Uses Google's batch HTTP endpoint (up to 50 calls per batch): one batch reads
+    the current descriptions, a second patches the new ones in.
+    Returns {event_id: True/False} so failed events can be retried on their own.
+    """
+    service = get_service('calendar', 'v3')
+    results = {event_id: False for event_id in form_urls}
+    event_ids = list(form_urls)
+
+    for start in range(0, len(event_ids), batch_size):
+        chunk = event_ids[start:start + batch_size]
+
+        # 1. Read current descriptions
+        descriptions = {}
+
+        def on_get(request_id, response, exception):
+            if exception is not None:
+                print(f"Error reading event {request_id}: {exception}")
+            else:
+                descriptions[request_id] = response.get('description', '')
+
+        batch = service.new_batch_http_request(callback=on_get)
+        for event_id in chunk:
+            batch.add(
+                service.events().get(calendarId=config.CALENDAR_ID, eventId=event_id, fields='id,description'),
+                request_id=event_id
+            )
+        try:
+            # Each call inside a batch counts against the quota on its own
+            wait_for_quota('calendar', len(chunk))
+            with observe_api_call('calendar', 'calendar.batch'):
+                batch.execute()
+        except Exception as e:
+            print(f"Calendar batch read failed: {e}")
+            continue
+
+        if not descriptions:
+            continue
+
+        # 2. Write descriptions with the form link
+        def on_patch(request_id, response, exception):
+            if exception is not None:
+                print(f"Error updating event {request_id}: {exception}")
+            else:
+                results[request_id] = True
+
+        batch = service.new_batch_http_request(callback=on_patch)
+        for event_id, description in descriptions.items():
+            batch.add(
+                service.events().patch(
+                    calendarId=config.CALENDAR_ID,
+                    eventId=event_id,
+                    body={'description': _with_form_link(description, form_urls[event_id])},
+                    fields='id'
+                ),
+                request_id=event_id
+            )
+        try:
+            wait_for_quota('calendar', len(descriptions))
+            with observe_api_call('calendar', 'calendar.batch'):
+                batch.execute()
+        except Exception as e:
+            print(f"Calendar batch write failed: {e}")
+
+    updated = sum(1 for ok in results.values() if ok)
+    print(f"Updated {updated}/{len(results)} events with form URLs")
+    return results
+
+
 def mark_event_as_completed(event_id):
     """
     Removes the form URL from the event description and marks it as completed.
@@ -214,9 +453,7 @@ def mark_event_as_completed(event_id):
         
         # Remove the Form URL line using regex
         # Matches "📋 Form: http..." and any surrounding whitespace
-        import re
-        form_link_pattern = r'\n?📋 Form: https?://[^\s]+'
-        new_description = re.sub(form_link_pattern, '', current_description)
+        new_description = _FORM_LINK_RE.sub('', current_description)
         
         # Clean up extra newlines
         new_description = new_description.strip()
@@ -0,0 +1,55 @@
+import threading
+import config
+from utils.logger import log_info, log_error
+
+
+class DashboardRefresher:
+    """
+    Coalesces Summary dashboard rebuilds.
+
+    Callers mark the dashboard dirty; the first mark starts a timer and every
+    further mark inside the debounce window rides along with it. When the timer
+    fires, one rebuild runs on a background thread, off the request path.
+    """
+
+    def __init__(self, debounce_seconds):
+        self.debounce_seconds = debounce_seconds
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._timer = None
+
+    def mark_dirty(self):
+        """Schedules a rebuild unless one is already pending."""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.debounce_seconds, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Runs a pending rebuild right away (e.g. before a one-off script exits)."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is None:
+            return
+        timer.cancel()
+        self._rebuild()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+        self._rebuild()
+
+    def _rebuild(self):
+        # Marks that arrive during a rebuild schedule the next one; rebuilds never overlap
+        with self._rebuild_lock:
+            try:
+                from services.sheets import SheetsService
+                SheetsService().ensure_dashboard_sheet()
+                log_info("Summary dashboard refreshed")
+            except Exception as e:
+                log_error(f"Dashboard refresh failed: {e}")
+
+
+dashboard_refresher = DashboardRefresher(debounce_seconds=config.DASHBOARD_DEBOUNCE_SECONDS)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+class JobIndex:
+    """
+    Process-wide map of Job ID -> (sheet_name, row_number).
+
+    Populated from one bulk read of column B across all monthly sheets and then
+    kept current by SheetsService as rows are created or shifted. Positions are
+    hints: callers must verify the row still holds the job before trusting it,
+    since rows can also move through manual edits in Google Sheets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._built = False
+        self._loaded_at = None
+        # Row inserts applied per sheet; see generations()
+        self._generations = {}
+        # Held while a rebuild runs, so concurrent misses wait for one batchGet
+        self.rebuild_lock = threading.Lock()
+
+    def is_built(self):
+        with self._lock:
+            return self._built
+
+    def rebuild_due(self, min_interval):
+        """
+        True if the index was never built (or was invalidated), or was last
+        loaded more than `min_interval` seconds ago. Lookups for IDs that are
+        not in any sheet miss every time; this keeps them from spending a
+        batchGet each.
+        """
+        with self._lock:
+            return self._loaded_at is None or time.monotonic() - self._loaded_at >= min_interval
+
+    def get(self, job_id):
+        """Returns (sheet_name, row_number) or None if the job is unknown."""
+        with self._lock:
+            return self._entries.get(job_id)
+
+    def generations(self):
+        """
+        Snapshot of the per-sheet insert counters. Take it before a bulk read
+        and pass it to load(), so inserts made during the read aren't undone.
+        """
+        with self._lock:
+            return dict(self._generations)
+
+    def load(self, entries, generations=None):
+        """
+        Replaces the whole index with a freshly read {job_id: (sheet, row)} map.
+        With `generations` from before the read, sheets that had rows inserted
+        since keep their current entries: the read predates those shifts.
+        """
+        with self._lock:
+            entries = dict(entries)
+            if generations is not None:
+                changed = {sheet for sheet, gen in self._generations.items() if generations.get(sheet, 0) != gen}
+                if changed:
+                    entries = {j: loc for j, loc in entries.items() if loc[0] not in changed}
+                    entries.update((j, loc) for j, loc in self._entries.items() if loc[0] in changed)
+            self._entries = entries
+            self._built = True
+            self._loaded_at = time.monotonic()
+
+    def set(self, job_id, sheet_name, row_num):
+        with self._lock:
+            self._entries[job_id] = (sheet_name, row_num)
+
+    def shift_rows(self, sheet_name, start_row, count):
+        """
+        Moves every job at or below start_row in sheet_name down by count rows.
+        Called after rows are inserted so existing positions stay correct.
+        """
+        with self._lock:
+            self._generations[sheet_name] = self._generations.get(sheet_name, 0) + 1
+            for job_id, (sheet, row) in self._entries.items():
+                if sheet == sheet_name and row >= start_row:
+                    self._entries[job_id] = (sheet, row + count)
+
+    def invalidate(self):
+        """Drops all positions; the next miss triggers a full rebuild."""
+        with self._lock:
+            self._entries = {}
+            self._built = False
+            self._loaded_at = None
+
+
+# Shared by every SheetsService instance in this process
+job_index = JobIndex()
@@ -0,0 +1,149 @@
+import threading
+from datetime import datetime, timezone
+from utils.local_db import get_connection
+
+# Monthly sheet columns A-I, in order
+COLUMNS = ['date', 'job_id', 'summary', 'status', 'total', 'net', 'payment', 'submitted_at', 'source']
+
+_schema_ready = threading.local()
+
+
+class JobMirror:
+    """
+    Local SQLite copy of every job row in the monthly sheets.
+
+    SheetsService writes through it when it creates or updates rows, and a periodic
+    full sync (SheetsService.sync_mirror) brings in manual edits made in Google
+    Sheets. Form reads are then served from local disk instead of the Sheets API.
+    Positions (sheet, row) are kept alongside each job so row shifts can be applied.
+    """
+
+    def _conn(self):
+        conn = get_connection()
+        if not getattr(_schema_ready, 'done', False):
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS jobs ('
+                    'job_id TEXT PRIMARY KEY, sheet TEXT NOT NULL, row INTEGER NOT NULL, '
+                    'date TEXT, summary TEXT, status TEXT, total TEXT, net TEXT, '
+                    'payment TEXT, submitted_at TEXT, source TEXT)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS jobs_by_date ON jobs (date, status)')
+                conn.execute('CREATE TABLE IF NOT EXISTS mirror_meta (key TEXT PRIMARY KEY, value TEXT)')
+            _schema_ready.done = True
+        return conn
+
+    def is_ready(self):
+        """True once at least one full sync has completed."""
+        return self.last_synced_at() is not None
+
+    def last_synced_at(self):
+        row = self._conn().execute("SELECT value FROM mirror_meta WHERE key = 'last_sync'").fetchone()
+        return row[0] if row else None
+
+    def get(self, job_id):
+        """Returns (row_number, row_data, sheet_name) like SheetsService.get_job_by_id, or None."""
+        row = self._conn().execute(
+            f"SELECT row, sheet, {', '.join(COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return (row[0], _trim(row[2:]), row[1])
+
+    def date_exists(self, date_str):
+        row = self._conn().execute('SELECT 1 FROM jobs WHERE date = ? LIMIT 1', (date_str,)).fetchone()
+        return row is not None
+
+    def missing_reports(self, date_str):
+        """
+        (job_id, summary) of the jobs on date_str with no report yet (blank status),
+        in sheet order. Answered from the (date, status) index, no table scan.
+        """
+        rows = self._conn().execute(
+            "SELECT job_id, summary FROM jobs WHERE date = ? AND status = '' ORDER BY sheet, row", (date_str,)
+        ).fetchall()
+        return [tuple(r) for r in rows]
+
+    def upsert_row(self, sheet_name, row_num, row_data):
+        """Stores one sheet row (list of up to 9 cells) at its position."""
+        values = _pad(row_data)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO jobs (job_id, sheet, row, {', '.join(COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(COLUMNS))})",
+                [values[1], sheet_name, row_num] + values
+            )
+
+    def update_submission(self, job_id, status, total, net, payment, submitted_at):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, total = ?, net = ?, payment = ?, submitted_at = ? WHERE job_id = ?',
+                (status, total, net, payment, submitted_at, job_id)
+            )
+
+    def shift_rows(self, sheet_name, start_row, count):
+        """Mirrors an insert of `count` rows at start_row in sheet_name."""
+        conn = self._conn()
+        with conn:
+            conn.execute('UPDATE jobs SET row = row + ? WHERE sheet = ? AND row >= ?', (count, sheet_name, start_row))
+
+    def sync(self, rows_by_sheet):
+        """
+        Diff-syncs the mirror against a full read of the sheets.
+        rows_by_sheet: {sheet_name: [row, ...]} with rows as returned by values().get
+        (header rows included). Only changed rows are written.
+        Returns (upserted, deleted) counts.
+        """
+        fresh = {}
+        for sheet_name, rows in rows_by_sheet.items():
+            # Rows 1-2 are header/totals, data starts at row 3
+            for row_num, row in enumerate(rows[2:], start=3):
+                values = _pad(row)
+                # First sheet wins for duplicate IDs, matching the job index
+                if values[1] and values[1] not in fresh:
+                    fresh[values[1]] = (sheet_name, row_num, *values)
+
+        conn = self._conn()
+        current = {
+            r[0]: tuple(r)
+            for r in conn.execute(f"SELECT job_id, sheet, row, {', '.join(COLUMNS)} FROM jobs")
+        }
+
+        upserts = [
+            (job_id, *record) for job_id, record in fresh.items()
+            if current.get(job_id) != (job_id, *record)
+        ]
+        deletes = [(job_id,) for job_id in current if job_id not in fresh]
+
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO jobs (job_id, sheet, row, {', '.join(COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(COLUMNS))})",
+                upserts
+            )
+            conn.executemany('DELETE FROM jobs WHERE job_id = ?', deletes)
+            conn.execute(
+                "INSERT OR REPLACE INTO mirror_meta (key, value) VALUES ('last_sync', ?)",
+                (datetime.now(timezone.utc).isoformat(),)
+            )
+
+        return len(upserts), len(deletes)
+
+
+def _pad(row):
+    """Row cells as exactly 9 strings (missing cells become '')."""
+    cells = ["" if v is None else str(v) for v in list(row)[:len(COLUMNS)]]
+    return cells + [""] * (len(COLUMNS) - len(cells))
+
+
+def _trim(values):
+    """Drops trailing empty cells, matching how the Sheets API returns rows."""
+    cells = ["" if v is None else v for v in values]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+job_mirror = JobMirror()
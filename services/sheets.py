@@ -1,24 +1,181 @@
 from services.auth import get_service
+from services.job_index import job_index
+from services.dashboard import dashboard_refresher
+from services.mirror import job_mirror
+from utils.file_lock import FileLock
 import config
+import os
+import re
+import threading
+import time
 from datetime import datetime
+from zoneinfo import ZoneInfo
+
+
+class SheetMetadataCache:
+    """
+    Title -> sheetId map of the target spreadsheet, shared by every SheetsService
+    in the process (web requests and the prepopulate job alike).
+    Entries expire after `ttl` seconds so tabs added or renamed by hand show up,
+    and SheetsService invalidates it whenever it adds a sheet itself.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sheet_ids = None
+        self._loaded_at = 0.0
+
+    def get(self, fetch):
+        """Returns the cached {title: sheetId} map, calling fetch() if it is missing or expired."""
+        sheet_ids = self.peek()
+        if sheet_ids is not None:
+            return sheet_ids
+
+        sheet_ids = fetch()
+        self.store(sheet_ids)
+        return sheet_ids
+
+    def peek(self):
+        """The cached map if still fresh, else None. Never fetches."""
+        with self._lock:
+            if self._sheet_ids is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._sheet_ids
+            return None
+
+    def store(self, sheet_ids):
+        with self._lock:
+            self._sheet_ids = sheet_ids
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._sheet_ids = None
+
+
+sheet_metadata = SheetMetadataCache(ttl=config.SHEET_METADATA_TTL_SECONDS)
+
+# One write lock per tab. Inserting rows moves every row below, so a row lookup
+# and the write that depends on it must not interleave with an insert into the
+# same tab from another thread or process. Different tabs are written concurrently.
+_sheet_locks = {}
+_sheet_locks_guard = threading.Lock()
+
+
+def sheet_write_lock(sheet_name):
+    with _sheet_locks_guard:
+        lock = _sheet_locks.get(sheet_name)
+        if lock is None:
+            file_name = re.sub(r'[^A-Za-z0-9_-]', '_', sheet_name) + '.lock'
+            lock = _sheet_locks[sheet_name] = FileLock(os.path.join(config.SHEET_LOCK_DIR, file_name))
+        return lock
+
+
+def job_index_entries(titles, value_ranges):
+    """{job_id: (sheet, row)} from a batchGet of column B, one value range per title."""
+    entries = {}
+    for title, value_range in zip(titles, value_ranges):
+        # Rows 1-2 are header/totals, data starts at row 3
+        for idx, row in enumerate(value_range.get('values', [])[2:], start=3):
+            if row and row[0]:
+                # First sheet wins, matching the old sheet-by-sheet search order
+                entries.setdefault(row[0], (title, idx))
+    return entries
+
+
+SUMMARY_HEADER = [
+    ["GLOBAL REVENUE HISTORY"],
+    ["Month", "Total Revenue", "Net Revenue", "Yelp Revenue", "Google LSA Revenue", "Yelp Jobs", "Google LSA Jobs", "Other Jobs", "Total Jobs"],
+]
+
+
+def _month_totals(rows):
+    """
+    Summary columns B:I for one monthly sheet from its B3:I values, matching
+    the formulas of the formula mode (SUMIF/COUNTIF compare case-insensitively).
+    """
+    total = net = yelp_revenue = lsa_revenue = 0
+    yelp_jobs = lsa_jobs = jobs = 0
+    for row in rows:
+        # B3:I -> 0: Job ID, 3: Total Revenue, 4: Net Revenue, 7: Source
+        revenue = _revenue(row[3]) if len(row) > 3 else 0
+        source = str(row[7]).strip().lower() if len(row) > 7 else ''
+        total += revenue
+        net += _revenue(row[4]) if len(row) > 4 else 0
+        if row and row[0] != '':
+            jobs += 1
+        if source == 'yelp':
+            yelp_revenue += revenue
+            yelp_jobs += 1
+        elif source == 'google lsa':
+            lsa_revenue += revenue
+            lsa_jobs += 1
+    return [_number(total), _number(net), _number(yelp_revenue), _number(lsa_revenue),
+            yelp_jobs, lsa_jobs, jobs - yelp_jobs - lsa_jobs, jobs]
+
+
+def _revenue(value):
+    """Numeric cell value, as SUM/SUMIF count it: text (even "1200") and booleans are 0."""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    return 0
+
+
+def _number(value):
+    """Whole floats as ints, so a value read back from Sheets compares equal."""
+    value = round(value, 2)
+    return int(value) if value == int(value) else value
+
+
+def _summary_cells(row):
+    """Summary row as comparable text, ignoring trailing blanks."""
+    cells = []
+    for v in row:
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            v = _number(v)
+        cells.append("" if v is None else str(v))
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+def _month_sheet_name(date_str):
+    """'2026-01-20' -> 'Jan 2026'"""
+    return datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %Y")
+
+
+def _row_runs(indexes):
+    """Sorted row indexes grouped into contiguous (first, last) runs."""
+    runs = []
+    for i in indexes:
+        if runs and runs[-1][1] == i - 1:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    return [tuple(run) for run in runs]
+
 
 class SheetsService:
     def __init__(self):
-        self.service = get_service('sheets', 'v4')
         self.spreadsheet_id = config.TARGET_SPREADSHEET_ID # "1USAoTNsUKIzg4XKzyeQANUYDNQCblQa8ROJ2Q3d1s7k"
-        
+
+    @property
+    def service(self):
+        # Resolved per call so one SheetsService can be shared across threads;
+        # get_service hands back this thread's pooled client.
+        return get_service('sheets', 'v4')
+
     def get_monthly_sheet_name(self):
-        """Returns the sheet name for current month, e.g., 'Jan 2026'"""
-        return datetime.now().strftime("%b %Y")
+        """Returns the sheet name for current month (LA time), e.g., 'Jan 2026'"""
+        return datetime.now(ZoneInfo('America/Los_Angeles')).strftime("%b %Y")
 
     def ensure_sheet_exists(self, sheet_name):
         """Checks if sheet exists, creates it if not.
         Also formatting: Freezes top 2 rows, adds headers and SUM formulas.
         """
-        spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-        existing_sheets = [s['properties']['title'] for s in spreadsheet.get('sheets', [])]
-        
-        if sheet_name not in existing_sheets:
+        if sheet_name not in self._get_sheet_titles():
             print(f"Sheet '{sheet_name}' not found. Creating it...")
             body = {
                 'requests': [
@@ -34,10 +191,13 @@ class SheetsService:
                     }
                 ]
             }
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheet_id, 
-                body=body
-            ).execute()
+            try:
+                self._add_sheet(body)
+            except Exception:
+                # Cached titles may be stale: the sheet could have been created elsewhere
+                if sheet_name in self._get_sheet_titles():
+                    return
+                raise
             
             # Add Headers (Row 1) and Total Formulas (Row 2)
             header = ["Date", "Job ID", "Summary", "Status", "Total Revenue", "Net Revenue", "Payment Type", "Submitted At", "Source"]
@@ -76,13 +236,41 @@ class SheetsService:
             except Exception as e:
                 print(f"Formatting failed (non-critical): {e}")
 
+            # New month: the Summary needs a row for it
+            dashboard_refresher.mark_dirty()
+
+    def _get_sheet_ids(self):
+        """Returns {title: sheetId} for all sheets, in tab order. Served from the metadata cache."""
+        def fetch():
+            spreadsheet = self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='sheets.properties(title,sheetId)'
+            ).execute()
+            return {s['properties']['title']: s['properties']['sheetId'] for s in spreadsheet.get('sheets', [])}
+
+        return sheet_metadata.get(fetch)
+
+    def _get_sheet_titles(self):
+        return list(self._get_sheet_ids())
+
     def _get_sheet_id(self, sheet_name):
         """Helper to get sheetId from sheet title"""
-        spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-        for s in spreadsheet.get('sheets', []):
-            if s['properties']['title'] == sheet_name:
-                return s['properties']['sheetId']
-        return 0
+        sheet_ids = self._get_sheet_ids()
+        if sheet_name not in sheet_ids:
+            # Possibly created since the cache was filled
+            sheet_metadata.invalidate()
+            sheet_ids = self._get_sheet_ids()
+        return sheet_ids.get(sheet_name, 0)
+
+    def _add_sheet(self, body):
+        """Runs an addSheet batchUpdate and drops the now-stale metadata cache."""
+        try:
+            return self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body=body
+            ).execute()
+        finally:
+            sheet_metadata.invalidate()
 
     def append_job_data(self, job_report_list):
         """
@@ -114,8 +302,8 @@ class SheetsService:
         
         print(f"{result.get('updates').get('updatedCells')} cells appended to {sheet_name}.")
         
-        # After appending, update the dashboard
-        self.ensure_dashboard_sheet()
+        # After appending, schedule a dashboard refresh
+        dashboard_refresher.mark_dirty()
         
         return result
 
@@ -123,12 +311,12 @@ class SheetsService:
     def ensure_dashboard_sheet(self):
         """
         Creates/Updates a 'Summary' sheet that aggregates totals from ALL monthly sheets.
+        Only rows that differ from the current Summary contents are rewritten.
+        Request paths should call dashboard_refresher.mark_dirty() instead.
         """
         try:
             dashboard_name = "Summary"
-            spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-            sheets = spreadsheet.get('sheets', [])
-            existing_sheet_titles = [s['properties']['title'] for s in sheets]
+            existing_sheet_titles = self._get_sheet_titles()
             
             # Ensure Summary sheet exists
             if dashboard_name not in existing_sheet_titles:
@@ -142,16 +330,12 @@ class SheetsService:
                         }
                     }]
                 }
-                self.service.spreadsheets().batchUpdate(
-                    spreadsheetId=self.spreadsheet_id, 
-                    body=body
-                ).execute()
+                self._add_sheet(body)
 
             # Filter for monthly sheets (e.g. "Jan 2026")
             import re
             monthly_sheets = []
-            for s in sheets:
-                title = s['properties']['title']
+            for title in existing_sheet_titles:
                 # Match "Mmm YYYY" pattern
                 if re.match(r'^[A-Z][a-z]{2} \d{4}$', title):
                     monthly_sheets.append(title)
@@ -162,66 +346,80 @@ class SheetsService:
             except ValueError:
                 pass # Keep original order if parsing fails
 
-            # Build Summary Table
-            # Header
-            summary_data = [
-                ["GLOBAL REVENUE HISTORY"],
-                ["Month", "Total Revenue", "Net Revenue", "Yelp Revenue", "Google LSA Revenue", "Yelp Jobs", "Google LSA Jobs", "Other Jobs", "Total Jobs"],
+            if config.SUMMARY_MODE == 'values':
+                summary_data, current = self._materialized_summary(dashboard_name, monthly_sheets)
+            else:
+                summary_data = SUMMARY_HEADER + self._formula_summary_rows(monthly_sheets)
+                # The per-month formulas update live, so usually this is a single read
+                current = self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"{dashboard_name}!A:I",
+                    valueRenderOption='FORMULA'
+                ).execute().get('values', [])
+
+            # Compare with what is already there and rewrite only what changed
+            changed = [
+                i for i in range(len(summary_data))
+                if _summary_cells(current[i] if i < len(current) else []) != _summary_cells(summary_data[i])
             ]
-            
-            # Rows for each month
-            for sheet in monthly_sheets:
-                # Using formulas is better so it updates live
-                # Monthly sheet columns — E: Total, F: Net, I: Source
-                row = [
-                    sheet, 
-                    f"=SUM('{sheet}'!E3:E)", 
-                    f"=SUM('{sheet}'!F3:F)",
-                    f"=SUMIF('{sheet}'!I3:I, \"Yelp\", '{sheet}'!E3:E)",
-                    f"=SUMIF('{sheet}'!I3:I, \"Google LSA\", '{sheet}'!E3:E)",
-                    f"=COUNTIF('{sheet}'!I3:I, \"Yelp\")",
-                    f"=COUNTIF('{sheet}'!I3:I, \"Google LSA\")",
-                    f"=COUNTA('{sheet}'!B3:B)-COUNTIF('{sheet}'!I3:I, \"Yelp\")-COUNTIF('{sheet}'!I3:I, \"Google LSA\")",
-                    f"=COUNTA('{sheet}'!B3:B)",
+            shrunk = len(current) > len(summary_data)
+
+            if not changed and not shrunk:
+                print("Summary dashboard unchanged.")
+                return
+            first_changed = changed[0] if changed else len(summary_data)
+
+            if config.SUMMARY_MODE == 'values':
+                # Static values: just the changed rows, as one write per contiguous run
+                data = [
+                    {'range': f"{dashboard_name}!A{first + 1}", 'values': summary_data[first:last + 1]}
+                    for first, last in _row_runs(changed)
                 ]
-                summary_data.append(row)
-                
-            # Grand Total Row
-            summary_data.append(["", "", "", "", "", "", "", "", ""]) # Spacer
-            summary_data.append([
-                "GRAND TOTAL", 
-                f"=SUM(B3:B{len(summary_data)})", 
-                f"=SUM(C3:C{len(summary_data)})",
-                f"=SUM(D3:D{len(summary_data)})",
-                f"=SUM(E3:E{len(summary_data)})",
-                f"=SUM(F3:F{len(summary_data)})",
-                f"=SUM(G3:G{len(summary_data)})",
-                f"=SUM(H3:H{len(summary_data)})",
-                f"=SUM(I3:I{len(summary_data)})",
-            ])
-            
-            # Write to Summary Sheet
-            self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{dashboard_name}!A1",
-                valueInputOption='USER_ENTERED',
-                body={'values': summary_data}
-            ).execute()
+                if data:
+                    self.service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=self.spreadsheet_id,
+                        body={'valueInputOption': 'RAW', 'data': data}
+                    ).execute()
+            elif first_changed < len(summary_data):
+                # Formulas: rows below a change may shift, so rewrite from there down
+                self.service.spreadsheets().values().update(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"{dashboard_name}!A{first_changed + 1}",
+                    valueInputOption='USER_ENTERED',
+                    body={'values': summary_data[first_changed:]}
+                ).execute()
+
+            # Clear leftovers if the table got shorter
+            if shrunk:
+                self.service.spreadsheets().values().clear(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"{dashboard_name}!A{len(summary_data) + 1}:I{len(current)}",
+                    body={}
+                ).execute()
             
             # Format Summary Sheet
+            dashboard_id = self._get_sheet_id(dashboard_name)
             format_requests = [
                 # Bold Header
                 {
                     'repeatCell': {
-                        'range': {'sheetId': self._get_sheet_id(dashboard_name), 'startRowIndex': 1, 'endRowIndex': 2},
+                        'range': {'sheetId': dashboard_id, 'startRowIndex': 1, 'endRowIndex': 2},
                         'cell': {'userEnteredFormat': {'textFormat': {'bold': True}}},
                         'fields': 'userEnteredFormat.textFormat.bold'
                     }
                 },
+                # Un-bold rewritten month rows (the old Grand Total row may now be a month)
+                {
+                    'repeatCell': {
+                        'range': {'sheetId': dashboard_id, 'startRowIndex': max(first_changed, 2), 'endRowIndex': max(len(current), len(summary_data) - 1)},
+                        'cell': {'userEnteredFormat': {'textFormat': {'bold': False}}},
+                        'fields': 'userEnteredFormat.textFormat.bold'
+                    }
+                },
                 # Bold Grand Total
                 {
                     'repeatCell': {
-                        'range': {'sheetId': self._get_sheet_id(dashboard_name), 'startRowIndex': len(summary_data)-1, 'endRowIndex': len(summary_data)},
+                        'range': {'sheetId': dashboard_id, 'startRowIndex': len(summary_data)-1, 'endRowIndex': len(summary_data)},
                         'cell': {'userEnteredFormat': {'textFormat': {'bold': True}}},
                         'fields': 'userEnteredFormat.textFormat.bold'
                     }
@@ -232,21 +430,80 @@ class SheetsService:
                 spreadsheetId=self.spreadsheet_id,
                 body={'requests': format_requests}
             ).execute()
+            print(f"Summary dashboard: {len(changed)} rows rewritten from row {first_changed + 1}")
             
         except Exception as e:
             from utils.logger import log_error
             log_error(f"Error updating dashboard: {e}")
 
+    @staticmethod
+    def _formula_summary_rows(monthly_sheets):
+        """Month rows and grand total as live formulas over each monthly sheet."""
+        rows = []
+        for sheet in monthly_sheets:
+            # Monthly sheet columns — E: Total, F: Net, I: Source
+            rows.append([
+                sheet, 
+                f"=SUM('{sheet}'!E3:E)", 
+                f"=SUM('{sheet}'!F3:F)",
+                f"=SUMIF('{sheet}'!I3:I, \"Yelp\", '{sheet}'!E3:E)",
+                f"=SUMIF('{sheet}'!I3:I, \"Google LSA\", '{sheet}'!E3:E)",
+                f"=COUNTIF('{sheet}'!I3:I, \"Yelp\")",
+                f"=COUNTIF('{sheet}'!I3:I, \"Google LSA\")",
+                f"=COUNTA('{sheet}'!B3:B)-COUNTIF('{sheet}'!I3:I, \"Yelp\")-COUNTIF('{sheet}'!I3:I, \"Google LSA\")",
+                f"=COUNTA('{sheet}'!B3:B)",
+            ])
+
+        last_row = len(SUMMARY_HEADER) + len(rows) + 1
+        rows.append(["", "", "", "", "", "", "", "", ""]) # Spacer
+        rows.append(["GRAND TOTAL"] + [f"=SUM({col}3:{col}{last_row})" for col in "BCDEFGHI"])
+        return rows
+
+    def _materialized_summary(self, dashboard_name, monthly_sheets):
+        """
+        SUMMARY_MODE=values: the same table computed here from one read of the
+        Summary and one batchGet of every monthly sheet, written as static values
+        so the workbook has no cross-sheet formulas to recalculate on each edit.
+        Returns (summary_data, current Summary rows).
+        """
+        # The Summary as FORMULA: formula cells come back as their text, so a Summary
+        # still holding the formula-mode table never compares equal and gets replaced
+        current = self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{dashboard_name}!A:I",
+            valueRenderOption='FORMULA'
+        ).execute().get('values', [])
+
+        # The monthly tabs as computed values, so hand-entered formulas count as SUM sees them
+        value_ranges = []
+        if monthly_sheets:
+            value_ranges = self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[f"'{sheet}'!B3:I" for sheet in monthly_sheets],
+                valueRenderOption='UNFORMATTED_VALUE'
+            ).execute().get('valueRanges', [])
+
+        rows = []
+        for sheet, value_range in zip(monthly_sheets, value_ranges):
+            rows.append([sheet] + _month_totals(value_range.get('values', [])))
+
+        grand_total = [_number(sum(row[col] for row in rows)) for col in range(1, 9)]
+        rows.append(["", "", "", "", "", "", "", "", ""]) # Spacer
+        rows.append(["GRAND TOTAL"] + grand_total)
+        return SUMMARY_HEADER + rows, current
+
     def check_date_exists(self, date_str):
         """
-        Checks if the given date string exists in Column A of the current month's sheet.
+        Checks if the given date string exists in Column A of its month's sheet.
+        Served from the local mirror when it is available.
         Returns True if found, False otherwise.
         """
         try:
-            sheet_name = self.get_monthly_sheet_name()
-            # Ensure sheet exists first (it might not if this is the first run of the month)
-            # But checking existence is expensive if we do full ensure.
-            # Let's just try to read. If sheet doesn't exist, date definitely doesn't exist.
+            if self.mirror_ready():
+                return job_mirror.date_exists(date_str)
+
+            # The sheet for the date's own month; if it doesn't exist yet, neither does the date
+            sheet_name = _month_sheet_name(date_str)
             
             # Read Column A (Dates)
             result = self.service.spreadsheets().values().get(
@@ -265,143 +522,485 @@ class SheetsService:
             # print(f"Check date error (likely sheet not found yet): {e}")
             return False
 
+    def get_missing_reports(self, date_str):
+        """
+        Jobs on date_str whose report has not been submitted (blank Status), as
+        (job_id, summary) pairs in sheet order. Served from the mirror's
+        (date, status) index when available; otherwise one read of that month's sheet.
+        """
+        if self.mirror_ready():
+            try:
+                return job_mirror.missing_reports(date_str)
+            except Exception as e:
+                print(f"Mirror lookup failed, reading from Sheets: {e}")
+
+        try:
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{_month_sheet_name(date_str)}'!A3:D"
+            ).execute()
+        except Exception:
+            return []  # No sheet for that month yet, so no jobs either
+
+        return [
+            (row[1], row[2] if len(row) > 2 else "")
+            for row in result.get('values', [])
+            if len(row) > 1 and row[0] == date_str and row[1] and not (len(row) > 3 and row[3])
+        ]
+
     def create_job_row(self, date_str, job_id, summary, source):
         """
         Creates a pre-populated row for a job with blank revenue fields.
         Inserts in date-sorted order so reconciled past jobs appear with their date group.
         Returns the row number where the job was inserted.
         """
-        import re as _re
-
         # Derive sheet name from the job's date (handles cross-month reconciliation)
         job_date = datetime.strptime(date_str, "%Y-%m-%d")
         sheet_name = job_date.strftime("%b %Y")
-        self.ensure_sheet_exists(sheet_name)
+        with sheet_write_lock(sheet_name):
+            self.ensure_sheet_exists(sheet_name)
 
-        # Row: [Date, Job ID, Summary, Status, Total Revenue, Net Revenue, Payment Type, Submitted At, Source]
-        row = [date_str, job_id, summary, "", None, None, "", "", source]
+            # Row: [Date, Job ID, Summary, Status, Total Revenue, Net Revenue, Payment Type, Submitted At, Source]
+            row = [date_str, job_id, summary, "", None, None, "", "", source]
+
+            # Find the correct insertion point (date-sorted, after header rows 1-2)
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{sheet_name}'!A:A"
+            ).execute()
+            dates = result.get('values', [])
+
+            # Find insert position: after the last row whose date <= date_str
+            # Rows 0,1 are header/totals, data starts at index 2 (sheet row 3)
+            insert_idx = len(dates)  # default: append at end
+            for i in range(2, len(dates)):
+                cell = dates[i][0] if dates[i] else ""
+                if cell > date_str:
+                    insert_idx = i
+                    break
+
+            # Guard: never insert at index 2 (row 3 boundary) as it can break
+            # the SUM formulas in row 2 that reference E3:E, F3:F.
+            # Instead, insert at index 3 (row 4) and the job will still be date-sorted.
+            if insert_idx <= 2:
+                insert_idx = 2  # will be at the top of data, but safe
+
+            sheet_row = insert_idx + 1  # 1-indexed sheet row number
+            sheet_id = self._get_sheet_id(sheet_name)
+
+            # Insert a blank row at the correct position
+            self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': [{
+                    'insertDimension': {
+                        'range': {
+                            'sheetId': sheet_id,
+                            'dimension': 'ROWS',
+                            'startIndex': insert_idx,   # 0-indexed
+                            'endIndex': insert_idx + 1
+                        },
+                        'inheritFromBefore': False
+                    }
+                }]}
+            ).execute()
+
+            # Everything from the inserted row down moved by one
+            self._shift_rows(sheet_name, sheet_row, 1)
+
+            # Write data into the newly inserted row
+            self.service.spreadsheets().values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{sheet_name}'!A{sheet_row}:I{sheet_row}",
+                valueInputOption='USER_ENTERED',
+                body={'values': [row]}
+            ).execute()
+            self.remember_row(sheet_name, sheet_row, row)
+
+        print(f"Created pre-populated row for job {job_id} at row {sheet_row}")
+        return sheet_row
+
+    def create_job_rows(self, job_rows):
+        """
+        Bulk version of create_job_row for many jobs at once.
+        job_rows: list of (date_str, job_id, summary, source).
+
+        Each affected sheet costs one read of columns A:B and one batchUpdate that
+        inserts and fills every new row, keeping the same date-sorted order
+        create_job_row produces (jobs of one date stay in the given order).
+        Jobs already present in their sheet are skipped.
+        Returns the list of job IDs that were created.
+        """
+        # Group by target sheet, keeping the caller's order within each sheet
+        by_sheet = {}
+        for date_str, job_id, summary, source in job_rows:
+            sheet_name = datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %Y")
+            by_sheet.setdefault(sheet_name, []).append((date_str, job_id, summary, source))
+
+        created = []
+        for sheet_name, rows in by_sheet.items():
+            created.extend(self._create_job_rows_in_sheet(sheet_name, rows))
+        return created
+
+    def _create_job_rows_in_sheet(self, sheet_name, rows):
+        with sheet_write_lock(sheet_name):
+            return self._insert_job_rows(sheet_name, rows)
+
+    def _insert_job_rows(self, sheet_name, rows):
+        """Body of _create_job_rows_in_sheet; the caller holds the tab's write lock."""
+        self.ensure_sheet_exists(sheet_name)
 
-        # Find the correct insertion point (date-sorted, after header rows 1-2)
         result = self.service.spreadsheets().values().get(
             spreadsheetId=self.spreadsheet_id,
-            range=f"'{sheet_name}'!A:A"
+            range=f"'{sheet_name}'!A:B"
         ).execute()
-        dates = result.get('values', [])
-
-        # Find insert position: after the last row whose date <= date_str
-        # Rows 0,1 are header/totals, data starts at index 2 (sheet row 3)
-        insert_idx = len(dates)  # default: append at end
-        for i in range(2, len(dates)):
-            cell = dates[i][0] if dates[i] else ""
-            if cell > date_str:
-                insert_idx = i
-                break
-
-        # Guard: never insert at index 2 (row 3 boundary) as it can break
-        # the SUM formulas in row 2 that reference E3:E, F3:F.
-        # Instead, insert at index 3 (row 4) and the job will still be date-sorted.
-        if insert_idx <= 2:
-            insert_idx = 2  # will be at the top of data, but safe
-
-        sheet_row = insert_idx + 1  # 1-indexed sheet row number
-        sheet_id = self._get_sheet_id(sheet_name)
+        existing = result.get('values', [])
+        existing_ids = {r[1] for r in existing[2:] if len(r) > 1}
 
-        # Insert a blank row at the correct position
-        self.service.spreadsheets().batchUpdate(
-            spreadsheetId=self.spreadsheet_id,
-            body={'requests': [{
+        # Group new jobs by date, dropping ones already in the sheet (or repeated)
+        by_date = {}
+        for date_str, job_id, summary, source in rows:
+            if job_id in existing_ids:
+                continue
+            existing_ids.add(job_id)
+            by_date.setdefault(date_str, []).append((job_id, summary, source))
+
+        if not by_date:
+            return []
+
+        # Same rule as create_job_row: before the first row with a later date,
+        # otherwise at the end; data starts at index 2 (sheet row 3)
+        groups = []
+        for date_str, jobs in by_date.items():
+            insert_idx = len(existing)
+            for i in range(2, len(existing)):
+                cell = existing[i][0] if existing[i] else ""
+                if cell > date_str:
+                    insert_idx = i
+                    break
+            groups.append((max(insert_idx, 2), date_str, jobs))
+
+        # Apply bottom-up so earlier insert positions are not shifted by later ones.
+        # Groups sharing a position go latest-date first, which leaves them date-sorted.
+        groups.sort(key=lambda g: (g[0], g[1]), reverse=True)
+
+        sheet_id = self._get_sheet_id(sheet_name)
+        requests = []
+        for insert_idx, date_str, jobs in groups:
+            requests.append({
                 'insertDimension': {
                     'range': {
                         'sheetId': sheet_id,
                         'dimension': 'ROWS',
-                        'startIndex': insert_idx,   # 0-indexed
-                        'endIndex': insert_idx + 1
+                        'startIndex': insert_idx,
+                        'endIndex': insert_idx + len(jobs)
                     },
                     'inheritFromBefore': False
                 }
-            }]}
-        ).execute()
+            })
+            # Values only: the inserted rows keep the formatting they inherit
+            # (e.g. currency on Total/Net); the mask would clear it otherwise
+            requests.append({
+                'updateCells': {
+                    'start': {'sheetId': sheet_id, 'rowIndex': insert_idx, 'columnIndex': 0},
+                    'rows': [self._job_row_cells(date_str, *job) for job in jobs],
+                    'fields': 'userEnteredValue'
+                }
+            })
+            # Column A alone gets the date format, as a USER_ENTERED date would
+            requests.append({
+                'repeatCell': {
+                    'range': {
+                        'sheetId': sheet_id,
+                        'startRowIndex': insert_idx,
+                        'endRowIndex': insert_idx + len(jobs),
+                        'startColumnIndex': 0,
+                        'endColumnIndex': 1
+                    },
+                    'cell': {'userEnteredFormat': {'numberFormat': {'type': 'DATE', 'pattern': 'yyyy-mm-dd'}}},
+                    'fields': 'userEnteredFormat.numberFormat'
+                }
+            })
 
-        # Write data into the newly inserted row
-        self.service.spreadsheets().values().update(
+        self.service.spreadsheets().batchUpdate(
             spreadsheetId=self.spreadsheet_id,
-            range=f"'{sheet_name}'!A{sheet_row}:I{sheet_row}",
-            valueInputOption='USER_ENTERED',
-            body={'values': [row]}
+            body={'requests': requests}
         ).execute()
 
-        print(f"Created pre-populated row for job {job_id} at row {sheet_row}")
-        return sheet_row
+        # Replay the shifts on the job index in the same order they were applied
+        for insert_idx, date_str, jobs in groups:
+            self._shift_rows(sheet_name, insert_idx + 1, len(jobs))
+
+        # Final positions: every group above (or same position, earlier date) pushes this one down
+        created = []
+        offset = 0
+        for insert_idx, date_str, jobs in reversed(groups):
+            for i, (job_id, summary, source) in enumerate(jobs):
+                row = [date_str, job_id, summary, "", "", "", "", "", source]
+                self.remember_row(sheet_name, insert_idx + offset + i + 1, row)
+                created.append(job_id)
+            offset += len(jobs)
+
+        print(f"Created {len(created)} pre-populated rows in {sheet_name}")
+        return created
+
+    @staticmethod
+    def _job_row_cells(date_str, job_id, summary, source):
+        """
+        RowData values for a blank job row, matching what USER_ENTERED writes produce:
+        the date as a date serial (formatted separately), the rest as plain text.
+        """
+        serial = (datetime.strptime(date_str, "%Y-%m-%d") - datetime(1899, 12, 30)).days
+
+        def text(value):
+            return {'userEnteredValue': {'stringValue': value}} if value else {}
+
+        # Row: [Date, Job ID, Summary, Status, Total Revenue, Net Revenue, Payment Type, Submitted At, Source]
+        return {'values': [
+            {'userEnteredValue': {'numberValue': serial}},
+            text(job_id),
+            text(summary),
+            {}, {}, {}, {}, {},
+            text(source),
+        ]}
 
     def get_job_by_id(self, job_id, sheet_name=None):
         """
         Finds a job row by its Job ID (Column B).
-        If sheet_name is None, searches ALL sheets (for cross-month lookups).
+        Served from the local SQLite mirror when possible (no API call); otherwise
+        uses the process-wide job index, so a lookup costs one single-row read.
+        If sheet_name is given, only a match in that sheet is returned.
         Returns tuple: (row_number, row_data, sheet_name) or (None, None, None) if not found.
         """
+        if not sheet_name and self.mirror_ready():
+            try:
+                found = job_mirror.get(job_id)
+                if found:
+                    return found
+            except Exception as e:
+                print(f"Mirror lookup failed, reading from Sheets: {e}")
+
+        return self._find_job(job_id, sheet_name)
+
+    def _find_job(self, job_id, sheet_name=None):
+        """
+        Live lookup against Google Sheets via the job index. The returned row is
+        read fresh and verified, so it is safe to write to.
+        """
         try:
-            # Get list of sheets to search
-            if sheet_name:
-                sheets_to_search = [sheet_name]
-            else:
-                # Get all sheet names from spreadsheet
-                spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-                sheets_to_search = [s['properties']['title'] for s in spreadsheet.get('sheets', [])]
-                # Exclude dashboard/summary sheets
-                sheets_to_search = [s for s in sheets_to_search if s != 'Summary']
-            
-            for current_sheet in sheets_to_search:
-                try:
-                    result = self.service.spreadsheets().values().get(
-                        spreadsheetId=self.spreadsheet_id,
-                        range=f"'{current_sheet}'!A:I"
-                    ).execute()
-                    
-                    rows = result.get('values', [])
-                    for idx, row in enumerate(rows):
-                        # Column B (index 1) is Job ID
-                        if len(row) > 1 and row[1] == job_id:
-                            return (idx + 1, row, current_sheet)  # 1-indexed row number + sheet name
-                except Exception:
-                    continue  # Sheet might be empty or inaccessible
-            
-            return (None, None, None)
-            
+            if sheet_name and not job_index.get(job_id):
+                # Scoped lookups (prepopulate dedup) mostly ask about jobs that do not
+                # exist yet, so scan just that sheet instead of rebuilding the index.
+                return self._scan_sheet_for_job(job_id, sheet_name)
+
+            location = job_index.get(job_id)
+            found = self._read_indexed_job(job_id)
+            if not found:
+                # Unknown or moved (e.g. rows inserted by hand or by another process):
+                # rebuild once and retry. One rebuild at a time, skipped if another
+                # thread just did one; IDs the index has never seen rebuild at most
+                # once per JOB_INDEX_MIN_REBUILD_SECONDS, so bogus links can't spend
+                # the read quota, while a known job whose row moved always can.
+                with job_index.rebuild_lock:
+                    if job_index.get(job_id) == location and (
+                            location or job_index.rebuild_due(config.JOB_INDEX_MIN_REBUILD_SECONDS)):
+                        self._build_job_index()
+                if job_index.get(job_id) != location:
+                    found = self._read_indexed_job(job_id)
+
+            if not found or (sheet_name and found[2] != sheet_name):
+                return (None, None, None)
+            return found
+
         except Exception as e:
             print(f"Error fetching job by ID: {e}")
             return (None, None, None)
 
+    def _read_indexed_job(self, job_id):
+        """
+        Reads the single row the index points at and verifies it still holds job_id.
+        Returns (row_number, row_data, sheet_name) or None.
+        """
+        location = job_index.get(job_id)
+        if not location:
+            return None
+
+        current_sheet, row_num = location
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"'{current_sheet}'!A{row_num}:I{row_num}"
+        ).execute()
+        rows = result.get('values', [])
+        row = rows[0] if rows else []
+
+        if len(row) > 1 and row[1] == job_id:
+            self.remember_row(current_sheet, row_num, row)
+            return (row_num, row, current_sheet)
+        return None
+
+    def _build_job_index(self):
+        """Rebuilds the job index from one batchGet of column B across all job sheets."""
+        titles = self._get_sheet_titles()
+        # Exclude dashboard/summary sheets
+        titles = [t for t in titles if t != 'Summary']
+
+        generations = job_index.generations()
+        entries = {}
+        if titles:
+            result = self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[f"'{t}'!B:B" for t in titles]
+            ).execute()
+            entries = job_index_entries(titles, result.get('valueRanges', []))
+
+        job_index.load(entries, generations)
+        print(f"Job index built: {len(entries)} jobs across {len(titles)} sheets")
+
+    def _scan_sheet_for_job(self, job_id, sheet_name):
+        """Full read of one sheet looking for job_id. Records any hit in the index."""
+        try:
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{sheet_name}'!A:I"
+            ).execute()
+        except Exception:
+            return (None, None, None)  # Sheet might be empty or inaccessible
+
+        rows = result.get('values', [])
+        for idx, row in enumerate(rows):
+            # Column B (index 1) is Job ID
+            if len(row) > 1 and row[1] == job_id:
+                self.remember_row(sheet_name, idx + 1, row)
+                return (idx + 1, row, sheet_name)  # 1-indexed row number + sheet name
+
+        return (None, None, None)
+
+    def sync_mirror(self):
+        """
+        Full diff-sync of the local mirror from one batchGet of A:I across all job
+        sheets. Picks up manual edits in Google Sheets; the same read also rebuilds
+        the job index. Returns (upserted, deleted) counts.
+        """
+        titles = [t for t in self._get_sheet_titles() if t != 'Summary']
+
+        # Rows inserted by this process during the read keep their shifted
+        # positions (see JobIndex.load); writes verify their row under the tab lock
+        generations = job_index.generations()
+        rows_by_sheet = {}
+        if titles:
+            result = self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[f"'{t}'!A:I" for t in titles]
+            ).execute()
+            for title, value_range in zip(titles, result.get('valueRanges', [])):
+                rows_by_sheet[title] = value_range.get('values', [])
+
+        upserted, deleted = job_mirror.sync(rows_by_sheet)
+        if (upserted or deleted) and config.SUMMARY_MODE == 'values':
+            # Static Summary values do not follow manual edits on their own
+            dashboard_refresher.mark_dirty()
+
+        entries = {}
+        for title, rows in rows_by_sheet.items():
+            for idx, row in enumerate(rows[2:], start=3):
+                if len(row) > 1 and row[1]:
+                    entries.setdefault(row[1], (title, idx))
+        job_index.load(entries, generations)
+
+        print(f"Mirror synced: {upserted} rows updated, {deleted} removed, {len(entries)} jobs")
+        return upserted, deleted
+
+    def warm_up(self):
+        """
+        Does the one-time work of the first job lookup ahead of traffic: loads
+        credentials, fetches a token, builds this thread's client, and builds the
+        job index unless the mirror already answers lookups.
+        """
+        self.service
+        if not self.mirror_ready():
+            self._build_job_index()
+
+    def mirror_ready(self):
+        """True if lookups can be served from the local mirror (enabled and synced at least once)."""
+        if not config.MIRROR_ENABLED:
+            return False
+        try:
+            return job_mirror.is_ready()
+        except Exception as e:
+            print(f"Mirror unavailable: {e}")
+            return False
+
+    def _shift_rows(self, sheet_name, start_row, count):
+        """Records an insert of `count` rows at start_row in the index and mirror."""
+        job_index.shift_rows(sheet_name, start_row, count)
+        if config.MIRROR_ENABLED:
+            try:
+                job_mirror.shift_rows(sheet_name, start_row, count)
+            except Exception as e:
+                print(f"Mirror update failed (non-critical): {e}")
+
+    def remember_row(self, sheet_name, row_num, row):
+        """Records a row we just wrote or read in the index and mirror."""
+        job_index.set(row[1], sheet_name, row_num)
+        if config.MIRROR_ENABLED:
+            try:
+                job_mirror.upsert_row(sheet_name, row_num, row)
+            except Exception as e:
+                print(f"Mirror update failed (non-critical): {e}")
+
     def update_job_row(self, job_id, status, total_rev, net_rev, payment_type):
         """
         Updates an existing job row with form submission data.
         Automatically finds the correct sheet by searching all sheets.
         Returns True on success, False on failure.
         """
-        # Find the job across all sheets
-        row_num, existing_row, sheet_name = self.get_job_by_id(job_id)
-        
-        if not row_num:
-            print(f"Job {job_id} not found in any sheet")
-            return False
-        
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # The index (or a live lookup) only tells us the tab; the row is verified
+        # under that tab's lock below. Never from the mirror: we write to this row.
+        location = job_index.get(job_id)
+        if location:
+            sheet_name = location[0]
+        else:
+            row_num, existing_row, sheet_name = self._find_job(job_id)
+            if not row_num:
+                print(f"Job {job_id} not found in any sheet")
+                return False
+
+        with sheet_write_lock(sheet_name):
+            # Rows inserted by another process (worker, scheduler) don't shift this
+            # process's index, so re-read the indexed row and check it still holds
+            # the job; if not, rebuild while holding the lock, so this tab can't move again.
+            found = self._read_indexed_job(job_id)
+            if not found:
+                with job_index.rebuild_lock:
+                    self._build_job_index()
+                found = self._read_indexed_job(job_id)
+            if not found or found[2] != sheet_name:
+                print(f"Job {job_id} not found in {sheet_name}")
+                return False
+            row_num = found[0]
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Update columns D through H (Status, Total, Net, Payment, Submitted At)
-        # D=4, E=5, F=6, G=7, H=8 (1-indexed in Sheets)
-        update_range = f"'{sheet_name}'!D{row_num}:H{row_num}"
-        update_values = [[status, total_rev, net_rev, payment_type, timestamp]]
+            # Update columns D through H (Status, Total, Net, Payment, Submitted At)
+            # D=4, E=5, F=6, G=7, H=8 (1-indexed in Sheets)
+            update_range = f"'{sheet_name}'!D{row_num}:H{row_num}"
+            update_values = [[status, total_rev, net_rev, payment_type, timestamp]]
         
-        self.service.spreadsheets().values().update(
-            spreadsheetId=self.spreadsheet_id,
-            range=update_range,
-            valueInputOption='USER_ENTERED',
-            body={'values': update_values}
-        ).execute()
+            self.service.spreadsheets().values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=update_range,
+                valueInputOption='USER_ENTERED',
+                body={'values': update_values}
+            ).execute()
         
+            if config.MIRROR_ENABLED:
+                try:
+                    job_mirror.update_submission(job_id, status, total_rev, net_rev, payment_type, timestamp)
+                except Exception as e:
+                    print(f"Mirror update failed (non-critical): {e}")
         print(f"Updated job {job_id} at row {row_num}")
         
-        # Update dashboard after changes
-        self.ensure_dashboard_sheet()
+        # Refresh the dashboard off the request thread (coalesced)
+        dashboard_refresher.mark_dirty()
         
         return True
 
@@ -0,0 +1,54 @@
+import fcntl
+import os
+import threading
+
+
+class FileLock:
+    """
+    Reentrant lock shared by the threads of this process and by the other
+    processes on the host (e.g. gunicorn workers and the scheduler): a
+    threading.RLock between threads, plus an exclusive flock on `path` held
+    while the outermost `with` block runs. As with LeaderLock, the OS drops
+    the flock if the holding process dies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                lock_dir = os.path.dirname(self.path)
+                if lock_dir and not os.path.exists(lock_dir):
+                    os.makedirs(lock_dir, exist_ok=True)
+                # Opened per acquire, so a descriptor inherited through fork is never shared
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from utils.local_db import get_connection
+
+_schema_ready = threading.local()
+
+
+class IdempotencyStore:
+    """
+    Remembers the result of each completed request by idempotency key, so a
+    repeat (double tap, browser retry) gets the original result back instead of
+    redoing the work. Bounded to `max_entries` keys, each kept for `ttl` seconds.
+
+    Keys live in the local SQLite database (utils.local_db), so a repeat that
+    lands on another worker process sees them too. A key is claimed while its
+    first request runs; a repeat arriving meanwhile waits for that request to
+    complete. If it fails and releases the key, the repeat takes over and runs
+    normally.
+    """
+
+    def __init__(self, name, max_entries, ttl, poll_interval=0.05):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+
+    def _conn(self):
+        conn = get_connection()
+        if not getattr(_schema_ready, 'done', False):
+            with conn:
+                # result is NULL while the first request is still running
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS idempotency ('
+                    'name TEXT NOT NULL, key TEXT NOT NULL, result TEXT, stored_at REAL NOT NULL, '
+                    'PRIMARY KEY (name, key))'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS idempotency_by_age ON idempotency (name, stored_at)')
+            _schema_ready.done = True
+        return conn
+
+    def claim(self, key, wait_timeout=30):
+        """
+        Returns the stored result for key, or None once the caller owns the key
+        (and must later call complete() or release()).
+        """
+        key = json.dumps(key)
+        conn = self._conn()
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            now = time.time()
+            with conn:
+                conn.execute('DELETE FROM idempotency WHERE name = ? AND stored_at < ?',
+                             (self.name, now - self.ttl))
+                claimed = conn.execute(
+                    'INSERT OR IGNORE INTO idempotency (name, key, result, stored_at) VALUES (?, ?, NULL, ?)',
+                    (self.name, key, now)).rowcount
+                if claimed:
+                    self._evict(conn)
+                    return None
+                row = conn.execute('SELECT result, stored_at FROM idempotency WHERE name = ? AND key = ?',
+                                   (self.name, key)).fetchone()
+                if row is None:
+                    continue  # Released between the insert and the read; try again
+                if row[0] is not None:
+                    return row[0]
+                if time.monotonic() >= deadline:
+                    # The first request is stuck; let this one run instead (once, if several wait)
+                    took_over = conn.execute(
+                        'UPDATE idempotency SET stored_at = ? '
+                        'WHERE name = ? AND key = ? AND result IS NULL AND stored_at = ?',
+                        (now, self.name, key, row[1])).rowcount
+                    if took_over:
+                        return None
+            time.sleep(self.poll_interval)
+
+    def complete(self, key, result):
+        conn = self._conn()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO idempotency (name, key, result, stored_at) VALUES (?, ?, ?, ?)',
+                         (self.name, json.dumps(key), result, time.time()))
+            self._evict(conn)
+
+    def release(self, key):
+        """Drops a claim that did not complete, so the next repeat runs normally."""
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM idempotency WHERE name = ? AND key = ? AND result IS NULL',
+                         (self.name, json.dumps(key)))
+
+    def _evict(self, conn):
+        conn.execute(
+            'DELETE FROM idempotency WHERE name = ? AND key NOT IN '
+            '(SELECT key FROM idempotency WHERE name = ? ORDER BY stored_at DESC LIMIT ?)',
+            (self.name, self.name, self.max_entries))
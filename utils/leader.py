@@ -0,0 +1,68 @@
+import fcntl
+import os
+import threading
+import time
+from utils.logger import log_info, log_error
+
+
+class LeaderLock:
+    """
+    Leader election between the processes on one host (e.g. gunicorn workers)
+    using an exclusive flock on `path`. The lock is held for as long as the
+    process keeps the file open and is released by the OS when it exits, so a
+    crashed leader never leaves a stale lock behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    @property
+    def is_leader(self):
+        return self._fd is not None
+
+    def try_acquire(self):
+        """Returns True if this process holds the lock (now or already)."""
+        if self._fd is not None:
+            return True
+        lock_dir = os.path.dirname(self.path)
+        if lock_dir and not os.path.exists(lock_dir):
+            os.makedirs(lock_dir, exist_ok=True)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        # PID is informational only (for whoever looks at the file)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def run_when_leader(self, on_elected, retry_seconds):
+        """
+        Calls on_elected() in this process once it holds the lock. Followers
+        retry every `retry_seconds` from a daemon thread, so another worker
+        takes over if the leader exits or is recycled.
+        """
+        if self.try_acquire():
+            on_elected()
+            return
+
+        log_info(f"Lock {self.path} held by another process; retrying every {retry_seconds}s (pid {os.getpid()})")
+
+        def wait_for_leadership():
+            while True:
+                time.sleep(retry_seconds)
+                try:
+                    if self.try_acquire():
+                        log_info(f"Took over lock {self.path} (pid {os.getpid()})")
+                        on_elected()
+                        return
+                except Exception as e:
+                    log_error(f"Leader election on {self.path} failed: {e}")
+
+        threading.Thread(target=wait_for_leadership, name='leader-election', daemon=True).start()
@@ -0,0 +1,24 @@
+import os
+import sqlite3
+import threading
+import config
+
+# One connection per thread; sqlite3 connections must not be shared across threads
+_thread_conn = threading.local()
+
+def get_connection():
+    """
+    Returns this thread's connection to the local state database (config.LOCAL_DB_PATH).
+    The file and its directory are created on first use.
+    """
+    conn = getattr(_thread_conn, 'conn', None)
+    if conn is None:
+        db_dir = os.path.dirname(config.LOCAL_DB_PATH)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        conn = sqlite3.connect(config.LOCAL_DB_PATH, timeout=30)
+        # WAL lets readers and the writer (web threads, scheduler) work concurrently
+        conn.execute('PRAGMA journal_mode=WAL')
+        _thread_conn.conn = conn
+    return conn
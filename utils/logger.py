@@ -1,34 +1,140 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import time
+from contextlib import contextmanager
+import config
 
-# Create logs directory if it doesn't exist
-LOG_DIR = 'logs'
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+# Callers only put records on a queue; one listener thread formats them and
+# does the file and console I/O, so logging never blocks a request on disk.
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-# Configure logging
-log_filename = os.path.join(LOG_DIR, f'app_{datetime.now().strftime("%Y%m%d")}.log')
+# Fields (job_id, route, task...) added to every record logged from the current
+# request or scheduled job; see log_context()
+_context = contextvars.ContextVar('log_context', default=None)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()  # Also print to console
-    ]
-)
+
+class TextFormatter(logging.Formatter):
+    """The classic text line, with any structured fields appended as key=value."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += " [" + " ".join(f"{k}={v}" for k, v in fields.items()) + "]"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, then the record's fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Runs in the calling thread: renders just the message (and a traceback, if
+    any) so the record is safe to hand over, attaches the context fields, and
+    enqueues it. Everything else happens on the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        fields = {}
+        context = _context.get()
+        if context:
+            started = context.get('_started')
+            fields.update((k, v) for k, v in context.items() if k != '_started')
+            if started is not None:
+                fields['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        fields.update(getattr(record, 'fields', None) or {})
+        record.fields = fields
+        return record
+
+
+def _file_handler(path):
+    log_dir = os.path.dirname(path)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+    if config.LOG_MAX_BYTES > 0:
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT)
+    return logging.handlers.TimedRotatingFileHandler(
+        path, when=config.LOG_ROTATE_WHEN, backupCount=config.LOG_BACKUP_COUNT)
+
+
+_exception_formatter = logging.Formatter()
+_formatter = JsonFormatter() if config.LOG_FORMAT == 'json' else TextFormatter(TEXT_FORMAT)
+
+_output_handlers = [logging.StreamHandler()]
+if config.LOG_FILE:
+    _output_handlers.append(_file_handler(config.LOG_FILE))
+for _handler in _output_handlers:
+    _handler.setFormatter(_formatter)
+
+_log_queue = queue.SimpleQueue()
+_listener = logging.handlers.QueueListener(_log_queue, *_output_handlers, respect_handler_level=True)
+_listener.start()
+# Flush what is still queued when the process exits
+atexit.register(_listener.stop)
+
+logging.basicConfig(level=logging.INFO, handlers=[_QueueHandler(_log_queue)])
 
 logger = logging.getLogger('job_form_automation')
 
-def log_info(message):
-    """Log info message"""
-    logger.info(message)
 
-def log_error(message, exc_info=None):
+def bind_log_context(**fields):
+    """
+    Adds fields to every record logged from this request or job until
+    clear_log_context(). The first bind also starts the elapsed_ms clock.
+    """
+    current = _context.get()
+    context = dict(current) if current else {'_started': time.perf_counter()}
+    context.update((k, v) for k, v in fields.items() if v is not None)
+    _context.set(context)
+
+def clear_log_context():
+    _context.set(None)
+
+@contextmanager
+def log_context(**fields):
+    """bind_log_context() for the duration of a with block (nests inside an outer context)."""
+    token = _context.set(_context.get())
+    bind_log_context(**fields)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+def log_info(message, **fields):
+    """Log info message; keyword fields (e.g. duration_ms=...) are added to the record"""
+    logger.info(message, extra={'fields': fields})
+
+def log_error(message, exc_info=None, **fields):
     """Log error message with optional exception info"""
-    logger.error(message, exc_info=exc_info)
+    logger.error(message, exc_info=exc_info, extra={'fields': fields})
 
-def log_warning(message):
+def log_warning(message, **fields):
     """Log warning message"""
-    logger.warning(message)
+    logger.warning(message, extra={'fields': fields})
@@ -0,0 +1,165 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets (seconds), same as the Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Scheduler jobs run for seconds to minutes
+JOB_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # {label_values: [bucket counts..., sum, count]}
+        self._values = {}
+
+    def observe(self, label_values, seconds):
+        series = self._values.get(label_values)
+        if series is None:
+            series = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ('le',)
+        for label_values, series in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(names, label_values + (_number(bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(names, label_values + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text format at /metrics.
+    Values live in this process only: with several gunicorn workers, each worker
+    reports its own series.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.api_calls = Counter(
+            'google_api_calls_total', "Google API requests executed, by API, method and status.",
+            ('api', 'method', 'status'))
+        self.api_latency = Histogram(
+            'google_api_request_duration_seconds', "Latency of Google API requests.",
+            ('api', 'method'))
+        self.api_throttle = Counter(
+            'google_api_throttled_seconds_total', "Time spent waiting on the client-side rate limiter, by quota.",
+            ('quota',))
+        self.http_requests = Counter(
+            'http_requests_total', "HTTP requests served, by route, method and status.",
+            ('route', 'method', 'status'))
+        self.http_latency = Histogram(
+            'http_request_duration_seconds', "Time spent serving HTTP requests.",
+            ('route', 'method'))
+        self.job_runs = Counter(
+            'scheduler_job_runs_total', "Scheduler job runs, by job and outcome.",
+            ('job', 'status'))
+        self.job_duration = Histogram(
+            'scheduler_job_duration_seconds', "Duration of scheduler job runs.",
+            ('job',), buckets=JOB_BUCKETS)
+
+    def record_api_call(self, api, method, status, seconds):
+        with self._lock:
+            self.api_calls.inc((api, method, str(status)))
+            self.api_latency.observe((api, method), seconds)
+
+    def record_throttle(self, quota, seconds):
+        with self._lock:
+            self.api_throttle.inc((quota,), seconds)
+
+    def record_http_request(self, route, method, status, seconds):
+        with self._lock:
+            self.http_requests.inc((route, method, str(status)))
+            self.http_latency.observe((route, method), seconds)
+
+    def record_job_run(self, job, status, seconds):
+        with self._lock:
+            self.job_runs.inc((job, status))
+            self.job_duration.observe((job,), seconds)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.api_calls, self.api_latency, self.api_throttle, self.http_requests,
+                           self.http_latency, self.job_runs, self.job_duration):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@contextmanager
+def observe_api_call(api, method):
+    """
+    Times one Google API round trip. The status label is 'ok', the HTTP status of
+    an HttpError, or 'error' for anything else (timeouts, connection resets).
+    """
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except Exception as e:
+        resp = getattr(e, 'resp', None)
+        status = getattr(resp, 'status', None) or 'error'
+        raise
+    finally:
+        metrics.record_api_call(api, method, status, time.perf_counter() - started)
+
+
+@contextmanager
+def observe_job(job):
+    """Times one scheduler job run; exceptions are recorded as 'error' and re-raised."""
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except Exception:
+        status = 'error'
+        raise
+    finally:
+        metrics.record_job_run(job, status, time.perf_counter() - started)
+
+
+def _labels(names, values):
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
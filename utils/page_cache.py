@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from utils.local_db import get_connection
+
+_schema_ready = threading.local()
+
+
+class PageCache:
+    """
+    Small thread-safe LRU of rendered pages: key -> (etag, body).
+    Entries expire after `ttl` seconds so edits made directly in Google Sheets
+    still show up, and callers invalidate a key when they change its data.
+
+    With shared=True, invalidations also reach the other worker processes on
+    this host: each key has a version number in the local SQLite database
+    (utils.local_db), invalidate() bumps it, and get() drops entries stored
+    under an older version. Callers read version() before loading the data
+    they cache and pass it to put(), so a page built from data that changed
+    meanwhile is never served as current.
+    """
+
+    def __init__(self, max_entries, ttl, shared=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (etag, body, stored_at, version)
+
+    def _conn(self):
+        conn = get_connection()
+        if not getattr(_schema_ready, 'done', False):
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS page_versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            _schema_ready.done = True
+        return conn
+
+    def version(self, key):
+        """Current version of key (0 until first invalidated; always 0 unless shared), or None if unavailable."""
+        if not self.shared:
+            return 0
+        try:
+            row = self._conn().execute('SELECT version FROM page_versions WHERE key = ?', (key,)).fetchone()
+        except Exception as e:
+            print(f"Page cache version read failed: {e}")
+            return None
+        return row[0] if row else 0
+
+    def get(self, key):
+        """Returns (etag, body) or None if missing, expired or invalidated elsewhere."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] >= self.ttl:
+                del self._entries[key]
+                return None
+        if self.shared:
+            version = self.version(key)
+            if version is None or version != entry[3]:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, key, etag, body, version=0):
+        if self.max_entries <= 0 or version is None:
+            return
+        with self._lock:
+            self._entries[key] = (etag, body, time.monotonic(), version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared:
+            try:
+                conn = self._conn()
+                with conn:
+                    conn.execute(
+                        'INSERT INTO page_versions (key, version) VALUES (?, 1) '
+                        'ON CONFLICT (key) DO UPDATE SET version = version + 1', (key,))
+            except Exception as e:
+                # Other workers then keep their copy until it expires (ttl)
+                print(f"Page cache invalidation failed: {e}")
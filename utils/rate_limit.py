@@ -0,0 +1,65 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate_per_minute` tokens are added evenly over each
+    minute, up to `burst`. acquire() blocks until enough tokens are available
+    (reserve() returns the wait instead), so bulk work slows to the quota
+    instead of running into 429s.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        # Default burst: ten seconds' worth, so a fresh bucket can't spend a minute's quota at once
+        self.capacity = burst or max(1, rate_per_minute // 6)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Takes `tokens` tokens now, going into debt if the bucket is short, and
+        returns the seconds the caller must wait before sending. Never blocks,
+        so async code can await the delay instead.
+        """
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens=1):
+        """Takes `tokens` tokens, sleeping as needed. Returns the seconds spent waiting."""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def backoff_delay(attempt, base=1.0, cap=32.0):
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,91 @@
+import queue
+import random
+import threading
+from utils.logger import log_info, log_error, log_warning
+
+
+class WorkQueue:
+    """
+    In-process queue for side effects that should not hold up an HTTP response.
+
+    A fixed pool of worker threads bounds concurrency. A task fails when it raises
+    or returns False; failed tasks are retried with jittered exponential backoff
+    and logged once they run out of attempts.
+    """
+
+    def __init__(self, name, workers=2, max_attempts=5, base_delay=2.0, max_delay=60.0):
+        self.name = name
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._waiting_retries = 0
+        self._running = 0
+
+    def submit(self, func, *args, description=None):
+        """Queues func(*args). Returns the queue depth after queuing."""
+        self._ensure_workers()
+        description = description or getattr(func, '__name__', 'task')
+        self._queue.put((func, args, description, 1))
+        depth = self.depth()
+        log_info(f"[{self.name} queue] Queued {description} (depth {depth})")
+        return depth
+
+    def depth(self):
+        """Unfinished tasks: queued, running, or waiting out a retry delay."""
+        with self._lock:
+            return self._queue.qsize() + self._waiting_retries + self._running
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            func, args, description, attempt = self._queue.get()
+            with self._lock:
+                self._running += 1
+            try:
+                try:
+                    ok = func(*args) is not False
+                    error = None if ok else "returned False"
+                except Exception as e:
+                    ok = False
+                    error = str(e)
+
+                if ok:
+                    continue
+
+                if attempt >= self.max_attempts:
+                    log_error(f"[{self.name} queue] {description} failed after {attempt} attempts: {error}")
+                    continue
+
+                delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                delay *= random.uniform(0.5, 1.0)
+                log_warning(f"[{self.name} queue] {description} failed (attempt {attempt}/{self.max_attempts}): {error}. Retrying in {delay:.1f}s")
+                self._schedule_retry(delay, (func, args, description, attempt + 1))
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
+
+    def _schedule_retry(self, delay, task):
+        with self._lock:
+            self._waiting_retries += 1
+
+        def requeue():
+            self._queue.put(task)
+            with self._lock:
+                self._waiting_retries -= 1
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        timer.start()